@@ -3,14 +3,1219 @@
 Created on Sun Sep 29 17:22:50 2019
 
 @author: eloda
+
+Le module s'importe sans matplotlib, qui n'est chargé que par les méthodes qui
+tracent des graphiques. Lancé en ligne de commande, il fait tourner des
+simulations sans affichage et écrit le bilan dans un fichier (voir main(),
+python TP_reseau.py --help).
 """
 
 from random import random
 from random import randint
-import matplotlib.pyplot as plt
-from random import sample
+from random import getstate
+from random import setstate
+from random import getrandbits
 import numpy as np
-from mp_toolkits.mplot3d import Axes3D
+import os
+import json
+import hashlib
+import itertools
+import heapq
+import time
+import platform
+import tracemalloc
+import contextlib
+import argparse
+import functools
+import importlib.util
+import multiprocessing
+from array import array
+from statistics import NormalDist
+from collections import OrderedDict
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+
+#Codes d'état d'une information pour une entité (Entite.infos_recues et matrice
+#d'état du moteur vectorisé). Les valeurs positives ou nulles donnent le nombre
+#de pas qu'il reste à l'information pour être consultée (0 : plus consultable),
+#les valeurs négatives son statut. Une information est donc visible (consultable
+#ou consultée et à renvoyer) si son code est > 0 ou vaut ETAT_CONSULTEE.
+ETAT_NON_RECUE = -1
+ETAT_CONSULTEE = -2
+ETAT_TRANSFEREE = -3
+
+
+def _developpe_voisins(debut, indices, sources):
+    """
+    Arguments :
+        - debut, indices : adjacence du réseau au format CSR, les voisins de
+        l'entité e sont indices[debut[e]:debut[e+1]] (np.array)
+        - sources : indices des entités dont on veut les voisins (np.array)
+        
+    Objectif :
+    Renvoie deux tableaux de même longueur (rang, voisins) : pour chaque voisin
+    de chaque source, le rang de la source dans sources et l'indice du voisin.
+    """
+    nb_voisins = debut[sources+1]-debut[sources]
+    rang = np.repeat(np.arange(len(sources)), nb_voisins)
+    decalage = np.arange(nb_voisins.sum())-np.repeat(np.cumsum(nb_voisins)-nb_voisins, nb_voisins)
+    voisins = indices[debut[sources][rang]+decalage]
+    return rang, voisins
+
+
+def _flux_aleas(rng, taille):
+    """
+    Arguments :
+        - rng : générateur aléatoire (numpy.random.Generator)
+        - taille : nombre de tirages du premier bloc (int)
+    Objectif :
+    Générateur de nombres aléatoires uniformes dans [0,1[ tirés par blocs (un
+    appel à rng par bloc, chaque bloc deux fois plus grand que le précédent).
+    Les nombres ne dépendent que de l'état de rng, pas de la taille des blocs.
+    """
+    taille = max(int(taille), 1)
+    while True:
+        yield from rng.random(taille).tolist()
+        taille *= 2
+
+
+def _manipule_cellules(etat, lignes, colonnes, p_cons, p_app, p_trans, degre, rng):
+    """
+    Arguments :
+        - etat : matrice d'état entités x informations (np.array, modifiée sur place)
+        - lignes, colonnes : cellules visibles à manipuler (np.array)
+        - p_cons, p_app, p_trans, degre : probabilités et nombre de voisins des
+        entités, indexés comme les lignes d'etat (np.array)
+        - rng : générateur aléatoire (numpy.random.Generator)
+    Objectif :
+    Fait pour un bloc de cellules ce que Entite.manipule_info() fait pour une
+    entité : décompte, consultation, appréciation et transfert. Renvoie les
+    cellules devenues non consultables (l, c), les cellules consultées et le
+    masque de celles appréciées (l, c, apprecie) et les cellules transférées (l, c).
+    """
+    #On actualise le nombre de pas restant aux infos encore consultables
+    codes = etat[lignes, colonnes]
+    a_decompter = codes > 0
+    codes[a_decompter] -= 1
+    etat[lignes[a_decompter], colonnes[a_decompter]] = codes[a_decompter]
+    expirees = a_decompter & (codes == 0)
+    
+    #On teste si les infos encore consultables sont consultées puis appréciées
+    l, c = lignes[codes > 0], colonnes[codes > 0]
+    consulte = rng.random(len(l)) < p_cons[l]
+    l, c = l[consulte], c[consulte]
+    etat[l, c] = ETAT_CONSULTEE
+    apprecie = rng.random(len(l)) < p_app[l]
+    
+    #On teste si les infos consultées sont transférées aux voisins
+    a_tester = etat[lignes, colonnes] == ETAT_CONSULTEE
+    l_trans, c_trans = lignes[a_tester], colonnes[a_tester]
+    transfere = (rng.random(len(l_trans)) < p_trans[l_trans]) & (degre[l_trans] > 0)
+    l_trans, c_trans = l_trans[transfere], c_trans[transfere]
+    etat[l_trans, c_trans] = ETAT_TRANSFEREE
+    return (lignes[expirees], colonnes[expirees]), (l, c, apprecie), (l_trans, c_trans)
+
+
+def _recoit_cellules(etat, differe, recepteurs, infos, emetteurs, pas_max_info):
+    """
+    Arguments :
+        - etat : matrice d'état entités x informations (np.array, modifiée sur place)
+        - differe : cellules reçues pendant le pas d'une entité déjà manipulée
+        (np.array de booléens de même forme qu'etat, modifiée sur place)
+        - recepteurs, infos, emetteurs : un transfert par case (np.array)
+        - pas_max_info : nombre de pas de consultabilité d'une information reçue (int)
+    Objectif :
+    Applique les transferts d'une vague. Renvoie les cellules nouvellement
+    reçues (l, c) et celles à manipuler dans la vague suivante du même pas
+    (l, c : récepteur d'identifiant plus grand que l'émetteur).
+    """
+    #On ne garde, pour chaque cellule qui reçoit l'info, que l'émetteur manipulé en premier
+    candidats = (etat[recepteurs, infos] == ETAT_NON_RECUE) | differe[recepteurs, infos]
+    recepteurs, infos, emetteurs = recepteurs[candidats], infos[candidats], emetteurs[candidats]
+    cle = infos.astype(np.int64)*len(etat) + recepteurs
+    ordre = np.lexsort((emetteurs, cle))
+    premier = np.ones(len(ordre), dtype=bool)
+    premier[1:] = cle[ordre][1:] != cle[ordre][:-1]
+    ordre = ordre[premier]
+    recepteurs, infos, emetteurs = recepteurs[ordre], infos[ordre], emetteurs[ordre]
+    
+    nouvelles = etat[recepteurs, infos] == ETAT_NON_RECUE
+    etat[recepteurs[nouvelles], infos[nouvelles]] = pas_max_info
+    immediates = recepteurs > emetteurs
+    differe[recepteurs[nouvelles & ~immediates], infos[nouvelles & ~immediates]] = True
+    differe[recepteurs[immediates], infos[immediates]] = False
+    return (recepteurs[nouvelles], infos[nouvelles]), (recepteurs[immediates], infos[immediates])
+
+
+class _SuiviInfos(object):
+    """
+    Suivi des informations commun aux moteurs à matrice d'état (simulation_vectorisee
+    et simulation_parallele) : informations restantes, injections, compteurs par
+    information et test de "mort" à la fin de chaque pas.
+    
+    Attributs :
+        - compteurs : nombres de réceptions, de fins de consultabilité, de
+        consultations et de transferts de chaque information (np.array 4 x infos),
+        dont nb_recues, nb_zero, nb_consult et nb_transferts sont les lignes
+        - pas_debut, temps, pic_visibles : comme les attributs de la classe information (np.array)
+        - consultables, envoyees : statut de chaque information (np.array de booléens)
+        - restantes : informations pas encore envoyées (liste d'int)
+    
+    Méthodes :
+        - compte_receptions(self, entites, infos) :
+        Compte (et enregistre) des réceptions
+        - injecte(self, pas, etat, debut, indices, rng, arrivees) :
+        Envoie les informations du pas à des entités choisies aléatoirement et à leurs voisins
+        - fin_pas(self, pas, nb_entites, compteurs) :
+        Relève les pics de visibilité et arrête les informations mortes
+        - termine(self, pas_max_simul) :
+        Donne leur temps dans le réseau aux informations encore consultables
+    """
+    
+    def __init__(self, nbre_infos, pas_max_info, enregistre=None):
+        """
+        Arguments :
+            - nbre_infos, pas_max_info : voir reseau.simulation()
+            - enregistre : fonction appelée avec (entites, infos, etat) pour chaque
+            bloc de réceptions, par exemple historique.enregistre_tableaux (ou None)
+        """
+        self.pas_max_info = pas_max_info
+        self.enregistre = enregistre
+        self.compteurs = np.zeros((4, nbre_infos), dtype=np.int64)
+        self.nb_recues, self.nb_zero, self.nb_consult, self.nb_transferts = self.compteurs
+        self.pic_visibles = np.zeros(nbre_infos, dtype=np.int64)
+        self.pas_debut = np.full(nbre_infos, -1, dtype=np.int64)
+        self.temps = np.zeros(nbre_infos, dtype=np.int64)
+        self.consultables = np.ones(nbre_infos, dtype=bool)
+        self.envoyees = np.zeros(nbre_infos, dtype=bool)
+        self.restantes = list(range(nbre_infos))
+    
+    def compte_receptions(self, entites, infos):
+        recues = np.bincount(infos, minlength=len(self.temps))
+        self.nb_recues += recues
+        if self.pas_max_info == 0:
+            self.nb_zero += recues
+        if self.enregistre is not None:
+            self.enregistre(entites, infos, self.pas_max_info)
+    
+    def injecte(self, pas, etat, debut, indices, rng, arrivees):
+        #On envoie des informations choisies aléatoirement parmi celles qui restent
+        #(une par défaut, voir arrivees) chacune à une entité choisie aléatoirement et à ses voisins
+        nb_arrivees = 1 if arrivees is None else arrivees(pas, rng.random)
+        for _ in range(min(nb_arrivees, len(self.restantes))):
+            rang_entite_alea = rng.integers(len(etat))
+            info = _retire_rang(self.restantes, rng.integers(len(self.restantes)))
+            self.pas_debut[info] = pas
+            self.envoyees[info] = True
+            cibles = np.unique(np.append(indices[debut[rang_entite_alea]:debut[rang_entite_alea+1]], rang_entite_alea))
+            cibles = cibles[etat[cibles, info] == ETAT_NON_RECUE]
+            etat[cibles, info] = self.pas_max_info
+            self.compte_receptions(cibles, np.full(len(cibles), info))
+    
+    def fin_pas(self, pas, nb_entites, compteurs=None):
+        """
+        Argument :
+            - compteurs : compteurs à utiliser à la place de self.compteurs (np.array 4 x infos)
+        Objectif :
+        Une info est "morte" si toutes les entités l'ont reçue et l'ont consultée
+        ou transférée, ou si elle n'est plus consultable pour celles qui l'ont reçue.
+        Renvoie les informations mortes pendant le pas (np.array).
+        """
+        nb_recues, nb_zero, nb_consult, nb_transferts = self.compteurs if compteurs is None else compteurs
+        a_tester = np.flatnonzero(self.envoyees & self.consultables)
+        self.pic_visibles[a_tester] = np.maximum(self.pic_visibles[a_tester],
+                                                 nb_recues[a_tester]-nb_zero[a_tester]-nb_transferts[a_tester])
+        recues = nb_recues[a_tester]
+        mortes = a_tester[((recues == nb_entites) & (nb_consult[a_tester] == recues)) | (nb_zero[a_tester] == recues)]
+        self.temps[mortes] = pas-self.pas_debut[mortes]
+        self.consultables[mortes] = False
+        return mortes
+    
+    def termine(self, pas_max_simul):
+        #Pour les infos encore consultables à la fin de la simulation, on stocke leur temps dans le réseau
+        a_finir = self.envoyees & self.consultables
+        self.temps[a_finir] = pas_max_simul-self.pas_debut[a_finir]
+
+
+
+def _parcours_largeur(debut, indices, source, pas_max=None):
+    """
+    Arguments :
+        - debut, indices : adjacence du réseau au format CSR (np.array)
+        - source : identifiant de l'entité de départ (int)
+        - pas_max : distance au-delà de laquelle on arrête le parcours (int ou None)
+        
+    Objectif :
+    Parcours en largeur depuis la source, en ne visitant chaque entité qu'une fois.
+    Renvoie le tableau des distances de la source à toutes les entités (-1 si
+    l'entité n'est pas atteignable). Le parcours part des voisins de la source
+    (distance 1) : distances[source] est donc la longueur du plus court cycle
+    passant par la source.
+    """
+    distances = np.full(len(debut)-1, -1, dtype=np.int32)
+    visitees = np.zeros(len(debut)-1, dtype=bool)
+    atteintes = np.zeros(len(debut)-1, dtype=bool)
+    frontiere = indices[debut[source]:debut[source+1]]
+    d = 1
+    while len(frontiere) > 0 and (pas_max is None or d <= pas_max):
+        atteintes[:] = False
+        atteintes[frontiere] = True
+        atteintes &= ~visitees
+        frontiere = np.flatnonzero(atteintes)
+        visitees[frontiere] = True
+        distances[frontiere] = d
+        _, frontiere = _developpe_voisins(debut, indices, frontiere)
+        d += 1
+    return distances
+
+
+#adjacence partagée par les processus qui calculent le diamètre
+_adjacence_processus = None
+
+def _init_processus_diametre(debut, indices):
+    global _adjacence_processus
+    _adjacence_processus = (debut, indices)
+
+def _excentricite_max(sources):
+    """
+    Argument :
+        - sources : identifiants des entités de départ (liste d'int)
+    Objectif :
+    Renvoie la plus grande distance entre une des sources et une autre entité,
+    avec l'adjacence du processus (voir _init_processus_diametre)
+    """
+    debut, indices = _adjacence_processus
+    maximum = 0
+    for source in sources:
+        distances = _parcours_largeur(debut, indices, source)
+        distances[source] = 0
+        maximum = max(maximum, int(distances.max()))
+    return maximum
+
+
+def _attache_tableaux(descriptions):
+    """
+    Argument :
+        - descriptions : (nom, forme, type) de blocs de mémoire partagée
+    Objectif :
+    Renvoie les blocs (multiprocessing.shared_memory.SharedMemory) et les
+    tableaux numpy qui les recouvrent.
+    """
+    blocs = [shared_memory.SharedMemory(name=nom) for nom, forme, dtype in descriptions]
+    tableaux = [np.ndarray(forme, dtype=dtype, buffer=bloc.buf) for bloc, (nom, forme, dtype) in zip(blocs, descriptions)]
+    return blocs, tableaux
+
+def _travailleur_tranche(descriptions, rang, bornes, pas_max_info, garde_transitions, graine, connexion):
+    """
+    Arguments :
+        - descriptions : blocs partagés de reseau.simulation_parallele(), voir
+        _attache_tableaux() et _Tranche
+        - rang, bornes, pas_max_info, garde_transitions : voir _Tranche
+        - graine : graine du générateur aléatoire du processus (numpy.random.SeedSequence)
+        - connexion : extrémité d'un multiprocessing.Pipe vers le coordinateur
+    Objectif :
+    Point d'entrée d'un processus de reseau.simulation_parallele() : exécute les
+    ordres du coordinateur jusqu'à l'ordre "fin".
+    """
+    blocs, tableaux = _attache_tableaux(descriptions)
+    tranche = _Tranche(tableaux, rang, bornes, pas_max_info, garde_transitions, np.random.default_rng(graine))
+    del tableaux
+    try:
+        tranche.boucle(connexion)
+    finally:
+        #On libère les vues sur les blocs avant de les fermer
+        tranche.ferme()
+        del tranche
+        for bloc in blocs:
+            bloc.close()
+
+
+class _Tranche(object):
+    """
+    Calcul d'une tranche d'entités (identifiants bornes[rang] à bornes[rang+1])
+    par un processus de reseau.simulation_parallele().
+    
+    Le processus ne modifie que les lignes de sa tranche de la matrice d'état
+    partagée. Chaque vague se fait en deux temps séparés par une barrière :
+     - ordres "pas" (toutes les cellules visibles de la tranche) ou "vague"
+     (cellules reçues à la vague précédente) : manipulation des cellules
+     (_manipule_cellules), puis écriture des transferts vers les voisins dans
+     le bloc partagé d'envoi du processus, rangés par tranche destinataire
+     (positions dans la ligne rang de decoupes) ;
+     - ordre "recois" : lecture dans les blocs d'envoi de tous les processus des
+     transferts destinés à la tranche et réception (_recoit_cellules).
+    Les compteurs par information sont ajoutés à la ligne rang du tableau partagé
+    compteurs. Les consultations, et les transitions si garde_transitions, sont
+    gardées avec leur (pas, vague) et renvoyées par l'ordre "bilan".
+    """
+    
+    def __init__(self, tableaux, rang, bornes, pas_max_info, garde_transitions, rng):
+        """
+        Arguments :
+            - tableaux : etat, p_cons, p_app, p_trans, debut, indices, compteurs
+            (processus x 4 x infos) et decoupes (processus x processus+1) partagés
+            - rang : numéro du processus (int)
+            - bornes : premières entités des tranches, et nombre d'entités (liste d'int)
+            - pas_max_info : voir reseau.simulation()
+            - garde_transitions : garde les transitions pour l'historique (bool)
+            - rng : générateur aléatoire du processus (numpy.random.Generator)
+        """
+        (self.etat, self.p_cons, self.p_app, self.p_trans, self.debut, self.indices,
+         self.compteurs, self.decoupes) = tableaux
+        self.rang = rang
+        self.bornes = np.array(bornes, dtype=np.int64)
+        self.premiere, self.fin = int(bornes[rang]), int(bornes[rang+1])
+        self.pas_max_info = pas_max_info
+        self.garde_transitions = garde_transitions
+        self.rng = rng
+        self.degre = np.diff(self.debut)
+        self.differe = np.zeros((self.fin-self.premiere, self.etat.shape[1]), dtype=bool)
+        self.a_manipuler = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+        self.pas = 0
+        self.vague = 0
+        self.consultations = []
+        self.transitions = []
+        self.envoi = None
+        self.capacite = max(1024, int(self.debut[self.fin]-self.debut[self.premiere]))
+        self.lus = {}
+    
+    def boucle(self, connexion):
+        while True:
+            ordre = connexion.recv()
+            if ordre[0] == "fin":
+                break
+            elif ordre[0] == "pas":
+                self.pas, self.vague = ordre[1], 0
+                self.differe[:] = False
+                tranche = self.etat[self.premiere:self.fin]
+                lignes, colonnes = np.nonzero((tranche > 0) | (tranche == ETAT_CONSULTEE))
+                del tranche
+                connexion.send(self.manipule(lignes + self.premiere, colonnes))
+            elif ordre[0] == "vague":
+                connexion.send(self.manipule(*self.a_manipuler))
+            elif ordre[0] == "recois":
+                connexion.send(self.recois(ordre[1]))
+            elif ordre[0] == "bilan":
+                connexion.send((self.consultations, self.transitions))
+                self.consultations, self.transitions = [], []
+    
+    def manipule(self, lignes, colonnes):
+        """
+        Objectif :
+        Manipule les cellules et écrit les transferts dans le bloc d'envoi.
+        Renvoie le nom du bloc d'envoi.
+        """
+        nbre_infos = self.etat.shape[1]
+        (l, c), (l_cons, c_cons, apprecie), (l_trans, c_trans) = _manipule_cellules(
+            self.etat, lignes, colonnes, self.p_cons, self.p_app, self.p_trans, self.degre, self.rng)
+        compteurs = self.compteurs[self.rang]
+        compteurs[1] += np.bincount(c, minlength=nbre_infos)
+        compteurs[2] += np.bincount(c_cons, minlength=nbre_infos)
+        compteurs[3] += np.bincount(c_trans, minlength=nbre_infos)
+        moment = (self.pas, self.vague, 0, self.rang)
+        self.consultations.append((moment, l_cons, c_cons, apprecie))
+        if self.garde_transitions:
+            self.transitions.extend([(moment+(0,), l, c, 0), (moment+(1,), l_cons, c_cons, ETAT_CONSULTEE),
+                                     (moment+(2,), l_trans, c_trans, ETAT_TRANSFEREE)])
+        
+        #On range les transferts par tranche destinataire
+        rang, recepteurs = _developpe_voisins(self.debut, self.indices, l_trans)
+        destinations = np.searchsorted(self.bornes, recepteurs, side="right")-1
+        ordre = np.argsort(destinations, kind="stable")
+        if self.envoi is None or len(ordre) > self.capacite:
+            self.capacite = max(len(ordre), 2*self.capacite if self.envoi is not None else self.capacite)
+            if self.envoi is not None:
+                self.envoi.close()
+                self.envoi.unlink()
+            self.envoi = shared_memory.SharedMemory(create=True, size=3*4*self.capacite)
+        envoi = np.ndarray((len(ordre), 3), dtype=np.int32, buffer=self.envoi.buf)
+        envoi[:, 0] = recepteurs[ordre]
+        envoi[:, 1] = c_trans[rang][ordre]
+        envoi[:, 2] = l_trans[rang][ordre]
+        del envoi
+        self.decoupes[self.rang, 0] = 0
+        self.decoupes[self.rang, 1:] = np.cumsum(np.bincount(destinations, minlength=len(self.bornes)-1))
+        return self.envoi.name
+    
+    def recois(self, noms):
+        """
+        Argument :
+            - noms : noms des blocs d'envoi des processus (liste de str)
+        Objectif :
+        Reçoit les transferts destinés à la tranche. Renvoie le nombre de
+        cellules à manipuler dans la vague suivante.
+        """
+        morceaux = []
+        for rang, nom in enumerate(noms):
+            debut_envoi, fin_envoi = int(self.decoupes[rang, self.rang]), int(self.decoupes[rang, self.rang+1])
+            if fin_envoi > debut_envoi:
+                if nom not in self.lus:
+                    self.lus[nom] = shared_memory.SharedMemory(name=nom)
+                morceaux.append(np.ndarray((fin_envoi, 3), dtype=np.int32, buffer=self.lus[nom].buf)[debut_envoi:].copy())
+        #On oublie les blocs d'envoi remplacés par des plus grands
+        for nom in set(self.lus)-set(noms):
+            self.lus.pop(nom).close()
+        
+        recus = np.concatenate(morceaux) if morceaux else np.zeros((0, 3), dtype=np.int32)
+        (l, c), (l_imm, c_imm) = _recoit_cellules(self.etat[self.premiere:self.fin], self.differe, recus[:, 0]-self.premiere,
+                                                  recus[:, 1], recus[:, 2]-self.premiere, self.pas_max_info)
+        l, l_imm = l + self.premiere, l_imm + self.premiere
+        recues = np.bincount(c, minlength=self.etat.shape[1])
+        self.compteurs[self.rang, 0] += recues
+        if self.pas_max_info == 0:
+            self.compteurs[self.rang, 1] += recues
+        if self.garde_transitions:
+            self.transitions.append(((self.pas, self.vague, 1, self.rang, 0), l, c, self.pas_max_info))
+        self.a_manipuler = (l_imm, c_imm)
+        self.vague += 1
+        return len(l_imm)
+    
+    def ferme(self):
+        for bloc in self.lus.values():
+            bloc.close()
+        if self.envoi is not None:
+            self.envoi.close()
+            self.envoi.unlink()
+        del self.etat, self.p_cons, self.p_app, self.p_trans, self.debut, self.indices, self.compteurs, self.decoupes
+
+
+
+
+def _csr_depuis_aretes(nb_entites, sources, cibles):
+    """
+    Arguments :
+        - nb_entites : nombre d'entités (int)
+        - sources, cibles : connexions source -> cible (np.array d'entiers)
+    Objectif :
+    Renvoie l'adjacence CSR (debut, indices) des connexions, sans doublons et
+    avec les voisins de chaque entité rangés par identifiant croissant.
+    """
+    cle = np.sort(sources.astype(np.int64)*nb_entites + cibles)
+    nouvelle = np.ones(len(cle), dtype=bool)
+    nouvelle[1:] = cle[1:] != cle[:-1]
+    cle = cle[nouvelle]
+    debut = np.zeros(nb_entites+1, dtype=np.int64)
+    debut[1:] = np.cumsum(np.bincount(cle // nb_entites, minlength=nb_entites))
+    return debut, (cle % nb_entites).astype(np.int32)
+
+
+def _symetrise(sources, cibles):
+    """
+    Objectif :
+    Renvoie les connexions dans les deux sens, sans les boucles (np.array, np.array)
+    """
+    garde = sources != cibles
+    sources, cibles = sources[garde], cibles[garde]
+    return np.concatenate((sources, cibles)), np.concatenate((cibles, sources))
+
+
+def topologie_erdos_renyi(nb_entites, rng, p=None, nb_aretes=None):
+    """
+    Arguments :
+        - nb_entites : nombre d'entités (int)
+        - rng : générateur aléatoire (numpy.random.Generator)
+        - p : probabilité de chaque connexion orientée (float), ou
+        - nb_aretes : nombre exact de connexions orientées, modèle G(n,m) (int)
+    Objectif :
+    Connexions orientées (une entité transfère à ses voisins) d'un graphe
+    d'Erdős–Rényi sans boucle, en O(n + m) : avec p, on saute d'une connexion
+    tirée à la suivante avec des écarts géométriques au lieu de tester chacune
+    des n(n-1) paires. Renvoie l'adjacence CSR (debut, indices).
+    """
+    nb_paires = nb_entites*(nb_entites-1)
+    if nb_aretes is not None:
+        positions = rng.choice(nb_paires, min(nb_aretes, nb_paires), replace=False) if nb_paires else np.zeros(0, dtype=np.int64)
+    elif p is None or p <= 0 or nb_paires == 0:
+        positions = np.zeros(0, dtype=np.int64)
+    elif p >= 1:
+        positions = np.arange(nb_paires, dtype=np.int64)
+    else:
+        #On tire les écarts par blocs d'environ la taille attendue du résultat
+        blocs, position = [], -1
+        taille = int(p*nb_paires*1.05)+100
+        while position < nb_paires:
+            sauts = np.cumsum(rng.geometric(p, taille), dtype=np.int64) + position
+            blocs.append(sauts)
+            position = int(sauts[-1])
+        positions = np.concatenate(blocs)
+        positions = positions[positions < nb_paires]
+    sources = positions // (nb_entites-1) if nb_entites > 1 else positions
+    cibles = positions % max(nb_entites-1, 1)
+    #la paire (s, c) avec c >= s désigne la cible c+1 : pas de boucle
+    cibles = cibles + (cibles >= sources)
+    return _csr_depuis_aretes(nb_entites, sources, cibles)
+
+
+def topologie_barabasi_albert(nb_entites, rng, m=3):
+    """
+    Arguments :
+        - nb_entites : nombre d'entités (int)
+        - rng : générateur aléatoire (numpy.random.Generator)
+        - m : nombre de connexions créées par chaque nouvelle entité (int)
+    Objectif :
+    Graphe non orienté à attachement préférentiel (Barabási–Albert) en O(n + m),
+    par l'algorithme de Batagelj et Brandes : la liste des extrémités des arêtes
+    contient chaque entité autant de fois que son degré, et la cible de l'arête e
+    est l'extrémité d'une position tirée au hasard avant elle. La position est
+    résolue en suivant ces renvois pour toutes les arêtes à la fois. Les boucles
+    et doublons sont supprimés. Renvoie l'adjacence CSR (debut, indices).
+    """
+    nb = nb_entites*m
+    #l'arête e part de l'entité e//m (extrémité 2e), sa cible (extrémité 2e+1)
+    #est l'extrémité d'une position tirée dans [0, 2e]
+    renvoi = (rng.random(nb)*(2*np.arange(nb)+1)).astype(np.int64)
+    position = renvoi.copy()
+    impaires = np.flatnonzero(position % 2 == 1)
+    while len(impaires):
+        position[impaires] = renvoi[(position[impaires]-1)//2]
+        impaires = impaires[position[impaires] % 2 == 1]
+    sources = np.arange(nb, dtype=np.int64) // m
+    cibles = (position//2) // m
+    return _csr_depuis_aretes(nb_entites, *_symetrise(sources, cibles))
+
+
+def topologie_watts_strogatz(nb_entites, rng, k=4, p=0.1):
+    """
+    Arguments :
+        - nb_entites : nombre d'entités (int)
+        - rng : générateur aléatoire (numpy.random.Generator)
+        - k : nombre de voisins de chaque entité sur l'anneau de départ (int pair)
+        - p : probabilité de recâbler chaque arête (float)
+    Objectif :
+    Graphe non orienté "petit monde" (Watts–Strogatz) en O(n + m) : chaque
+    entité est reliée à ses k/2 suivantes sur un anneau, puis la cible de chaque
+    arête est remplacée avec la probabilité p par une entité tirée au hasard
+    (les boucles et doublons ainsi créés sont supprimés).
+    Renvoie l'adjacence CSR (debut, indices).
+    """
+    sources = np.repeat(np.arange(nb_entites, dtype=np.int64), k//2)
+    cibles = (sources + np.tile(np.arange(1, k//2+1), nb_entites)) % max(nb_entites, 1)
+    recablees = rng.random(len(cibles)) < p
+    cibles[recablees] = rng.integers(nb_entites, size=int(recablees.sum()))
+    return _csr_depuis_aretes(nb_entites, *_symetrise(sources, cibles))
+
+
+
+def lit_aretes(chemin, binaire=None):
+    """
+    Arguments :
+        - chemin : fichier de connexions, une connexion "source cible" par ligne
+        (séparées par des espaces ou des tabulations, lignes commençant par # ignorées,
+        colonnes suivantes ignorées) ou, en binaire, une suite de paires d'int32 (str)
+        - binaire : format binaire, None pour le déduire de l'extension .bin ou .i32 (bool ou None)
+    Objectif :
+    Renvoie les tableaux (sources, cibles) des connexions. En binaire, le fichier
+    est projeté en mémoire (np.memmap) : les tableaux sont des vues sur le fichier,
+    qui n'est lu qu'à la demande.
+    """
+    if binaire is None:
+        binaire = os.path.splitext(chemin)[1] in (".bin", ".i32")
+    if binaire:
+        if os.path.getsize(chemin) == 0:
+            paires = np.zeros((0, 2), dtype=np.int32)
+        else:
+            paires = np.memmap(chemin, dtype=np.int32, mode="r").reshape(-1, 2)
+    else:
+        paires = np.loadtxt(chemin, dtype=np.int64, comments="#", usecols=(0, 1), ndmin=2)
+    return paires[:, 0], paires[:, 1]
+
+
+def _dimensions_aretes(sources, cibles, groupes):
+    """
+    Arguments :
+        - sources, cibles : connexions lues par lit_aretes (np.array d'entiers)
+        - groupes : nombres d'entités bon public et mauvais public (liste de 2 int)
+    Objectif :
+    Renvoie le nombre d'entités d'un fichier de connexions (le plus grand
+    identifiant plus un) et les groupes, pris comme proportions et remis à
+    l'échelle s'ils ne correspondent pas à ce nombre (int, liste de 2 int)
+    """
+    nb_entites = int(max(sources.max(), cibles.max()))+1 if len(sources) else 0
+    if sum(groupes) != nb_entites:
+        nb_bp = int(round(nb_entites*groupes[0]/max(sum(groupes), 1)))
+        groupes = [nb_bp, nb_entites-nb_bp]
+    return nb_entites, groupes
+
+
+def topologie_fichier(nb_entites, rng, chemin, binaire=None, oriente=True):
+    """
+    Arguments :
+        - nb_entites : nombre d'entités, supérieur aux identifiants du fichier (int)
+        - rng : inutilisé, pour avoir la même forme que les autres topologies
+        - chemin, binaire : voir lit_aretes
+        - oriente : une ligne "a b" fait de b un voisin de a (a transfère à b) ;
+        si False, chaque connexion est ajoutée dans les deux sens (bool)
+    Objectif :
+    Topologie lue dans un fichier (voir reseau.__init__ et reseau.depuis_fichier).
+    Renvoie l'adjacence CSR (debut, indices).
+    """
+    sources, cibles = lit_aretes(chemin, binaire)
+    if len(sources) and (min(sources.min(), cibles.min()) < 0 or max(sources.max(), cibles.max()) >= nb_entites):
+        raise ValueError("les identifiants des entités de %s doivent être dans [0, %d[" % (chemin, nb_entites))
+    if not oriente:
+        sources, cibles = np.concatenate((sources, cibles)), np.concatenate((cibles, sources))
+    return _csr_depuis_aretes(nb_entites, sources, cibles)
+
+
+#Processus d'arrivée des informations (argument arrivees des simulations) : fonctions
+#f(pas, tire) qui renvoient le nombre d'informations à injecter au pas "pas", tire()
+#donnant un nombre aléatoire uniforme dans [0,1[ du flux de la simulation.
+#Les paramètres se fixent avec functools.partial.
+
+def arrivees_par_pas(pas, tire, k=1):
+    """
+    Argument :
+        - k : nombre d'informations injectées à chaque pas (int)
+    Objectif :
+    Arrivées régulières, k informations par pas (k=1 : comportement par défaut)
+    """
+    return k
+
+
+def arrivees_poisson(pas, tire, taux=1.0):
+    """
+    Argument :
+        - taux : nombre moyen d'informations injectées par pas (float)
+    Objectif :
+    Arrivées de Poisson : le nombre d'informations d'un pas suit une loi de
+    Poisson de paramètre taux, tirée par inversion (un tirage par tranche de
+    500 du taux, pour que exp(-taux) reste représentable).
+    """
+    total = 0
+    while taux > 0:
+        lam = min(taux, 500.)
+        taux -= lam
+        u = tire()
+        x, p = 0, np.exp(-lam)
+        cumul = p
+        while u > cumul and p > 0:
+            x += 1
+            p *= lam/x
+            cumul += p
+        total += x
+    return total
+
+
+def arrivees_calendrier(pas, tire, calendrier):
+    """
+    Argument :
+        - calendrier : nombre d'informations à injecter à chaque pas, par exemple
+        lu par lit_calendrier() (np.array d'entiers)
+    Objectif :
+    Arrivées données par un calendrier, aucune après sa fin
+    """
+    return int(calendrier[pas]) if pas < len(calendrier) else 0
+
+
+def lit_calendrier(chemin, duree_pas=1.0):
+    """
+    Arguments :
+        - chemin : fichier texte avec une date d'injection par ligne (première
+        colonne, les lignes commençant par # sont ignorées) (str)
+        - duree_pas : durée d'un pas dans l'unité des dates (float)
+    Objectif :
+    Renvoie le nombre d'injections de chaque pas (np.array, indice = pas),
+    l'injection de date t étant faite au pas t // duree_pas.
+    """
+    dates = np.loadtxt(chemin, dtype=np.float64, comments="#", usecols=0, ndmin=1)
+    if len(dates) and dates.min() < 0:
+        raise ValueError("les dates de %s doivent être positives" % chemin)
+    return np.bincount(np.floor(dates/duree_pas).astype(np.int64))
+
+
+def _retire_rang(liste, rang):
+    """
+    Arguments :
+        - liste : liste (modifiée sur place)
+        - rang : position de l'élément à retirer (int)
+    Objectif :
+    Retire et renvoie liste[rang] en O(1), le dernier élément prenant sa place
+    """
+    element = liste[rang]
+    liste[rang] = liste[-1]
+    liste.pop()
+    return element
+
+
+
+
+class _DictVide(dict):
+    """
+    Dictionnaire vide auquel on ne peut pas ajouter de clé, partagé par les entités
+    qui n'ont encore reçu aucune information (infos_recues, instances_infos,
+    infos_actives), voir Entite.alloue_infos. Copié ou picklé, il reste le même objet.
+    """
+    __slots__ = ()
+    
+    def __setitem__(self, cle, valeur):
+        raise TypeError("dictionnaire vide partagé, appeler Entite.alloue_infos() avant d'écrire")
+    
+    def __reduce__(self):
+        return "_AUCUNE_INFO"
+    
+    def __deepcopy__(self, memo):
+        return self
+
+_AUCUNE_INFO = _DictVide()
+
+
+#Une transition d'état enregistrée par un historique : au pas "pas", l'information
+#"info" prend le code "etat" (voir ETAT_*) pour l'entité "entite".
+TRANSITION = np.dtype([("pas", np.int32), ("entite", np.int32), ("info", np.int32), ("etat", np.int32)])
+
+
+class HistoriqueVide(object):
+    """
+    Enregistreur d'historique d'une simulation qui ne garde rien.
+    
+    Les enregistreurs d'historique se passent à simulation() (argument historique)
+    à la place des copies de dict_general faites à chaque pas. Les entités leur
+    signalent chaque changement de statut d'une information (réception, fin de
+    consultabilité, consultation, transfert) ; les décomptes de pas ne sont pas
+    enregistrés.
+    
+    Attributs :
+        - pas : le pas de temps en cours, mis à jour par le réseau (int)
+        - nb_pas : le nombre de pas de la simulation enregistrée (int)
+    
+    Méthodes :
+        - enregistre(self, entite, info, etat) :
+        Enregistre une transition
+        - enregistre_tableaux(self, entites, infos, etat) :
+        Enregistre un bloc de transitions
+        - enregistre_appreciation(self, entite, info) :
+        Enregistre une appréciation (simulation() seulement)
+        - vues(self, nb_entites) :
+        Reconstruit pas à pas les dictionnaires de dict_general
+    """
+    
+    #les transitions enregistrées sont gardées (voir reseau.simulation_parallele)
+    garde_transitions = False
+    
+    def __init__(self):
+        self.pas = 0
+        self.nb_pas = 0
+    
+    def enregistre(self, entite, info, etat):
+        pass
+    
+    def enregistre_tableaux(self, entites, infos, etat):
+        pass
+    
+    def enregistre_appreciation(self, entite, info):
+        pass
+    
+    def transitions(self):
+        """
+        Objectif :
+        Renvoie les transitions enregistrées (np.array de type TRANSITION)
+        """
+        return np.zeros(0, dtype=TRANSITION)
+    
+    def vues(self, nb_entites):
+        """
+        Argument :
+            - nb_entites : le nombre d'entités du réseau (int)
+        Objectif :
+        Générateur qui renvoie, pour chaque pas, le couple (pas, dico) où dico a
+        la forme de dict_general[pas] : pour chaque entité (identifiant int),
+        le dictionnaire des informations consultables ou consultées et à renvoyer.
+        Les vues sont reconstruites en rejouant les transitions.
+        """
+        transitions = self.transitions()
+        etats = {}
+        debut = 0
+        fins = np.searchsorted(transitions["pas"], np.arange(self.nb_pas), side="right")
+        for pas in range(self.nb_pas):
+            bloc = transitions[debut:fins[pas]]
+            for entite, info, etat in zip(bloc["entite"].tolist(), bloc["info"].tolist(), bloc["etat"].tolist()):
+                etats[(entite, info)] = etat
+            debut = fins[pas]
+            vue = {entite: {} for entite in range(nb_entites)}
+            for (entite, info), etat in etats.items():
+                if etat > 0 or etat == ETAT_CONSULTEE:
+                    vue[entite][info] = 1
+            yield pas, vue
+    
+    def vue(self, pas, nb_entites):
+        """
+        Arguments :
+            - pas : le pas de temps voulu (int)
+            - nb_entites : le nombre d'entités du réseau (int)
+        Objectif :
+        Renvoie la vue du pas demandé (voir vues())
+        """
+        transitions = self.transitions()
+        transitions = transitions[transitions["pas"] <= pas]
+        cle = transitions["entite"].astype(np.int64)*(int(transitions["info"].max(initial=0))+1) + transitions["info"]
+        #on ne garde que la dernière transition de chaque couple (entité, info)
+        _, derniere = np.unique(cle[::-1], return_index=True)
+        transitions = transitions[::-1][derniere]
+        vue = {entite: {} for entite in range(nb_entites)}
+        visibles = (transitions["etat"] > 0) | (transitions["etat"] == ETAT_CONSULTEE)
+        for entite, info in zip(transitions["entite"][visibles].tolist(), transitions["info"][visibles].tolist()):
+            vue[entite][info] = 1
+        return vue
+
+
+class HistoriqueTransitions(HistoriqueVide):
+    """
+    Enregistreur d'historique qui garde en mémoire les seules transitions d'état
+    (pas, entité, info, nouvel état) dans des tableaux compacts d'entiers 32 bits.
+    """
+    
+    garde_transitions = True
+    
+    def __init__(self):
+        HistoriqueVide.__init__(self)
+        self._colonnes = {nom: array("i") for nom in TRANSITION.names}
+    
+    def enregistre(self, entite, info, etat):
+        colonnes = self._colonnes
+        colonnes["pas"].append(self.pas)
+        colonnes["entite"].append(entite)
+        colonnes["info"].append(info)
+        colonnes["etat"].append(etat)
+    
+    def enregistre_tableaux(self, entites, infos, etat):
+        entites = np.asarray(entites, dtype=np.int32)
+        colonnes = self._colonnes
+        colonnes["pas"].frombytes(np.full(len(entites), self.pas, dtype=np.int32).tobytes())
+        colonnes["entite"].frombytes(entites.tobytes())
+        colonnes["info"].frombytes(np.asarray(infos, dtype=np.int32).tobytes())
+        colonnes["etat"].frombytes(np.broadcast_to(np.asarray(etat, dtype=np.int32), entites.shape).tobytes())
+    
+    def transitions(self):
+        transitions = np.zeros(len(self._colonnes["pas"]), dtype=TRANSITION)
+        for nom in TRANSITION.names:
+            transitions[nom] = np.frombuffer(self._colonnes[nom], dtype=np.int32)
+        return transitions
+
+
+class HistoriqueFichier(HistoriqueTransitions):
+    """
+    Enregistreur d'historique qui écrit les transitions d'état au fil de l'eau
+    dans un fichier binaire (enregistrements TRANSITION), relu par projection
+    mémoire (np.memmap). Seules les dernières transitions, par paquets de
+    taille_tampon, sont gardées en mémoire.
+    """
+    
+    def __init__(self, chemin, taille_tampon=100000):
+        """
+        Arguments :
+            - chemin : chemin du fichier, écrasé s'il existe (str)
+            - taille_tampon : nombre de transitions gardées en mémoire avant écriture (int)
+        """
+        HistoriqueTransitions.__init__(self)
+        self.chemin = chemin
+        self.taille_tampon = taille_tampon
+        self._nb_ecrites = 0
+        open(chemin, "wb").close()
+    
+    def enregistre(self, entite, info, etat):
+        HistoriqueTransitions.enregistre(self, entite, info, etat)
+        if len(self._colonnes["pas"]) >= self.taille_tampon:
+            self.vide_tampon()
+    
+    def enregistre_tableaux(self, entites, infos, etat):
+        HistoriqueTransitions.enregistre_tableaux(self, entites, infos, etat)
+        if len(self._colonnes["pas"]) >= self.taille_tampon:
+            self.vide_tampon()
+    
+    def vide_tampon(self):
+        """
+        Objectif :
+        Ecrit à la fin du fichier les transitions gardées en mémoire
+        """
+        bloc = HistoriqueTransitions.transitions(self)
+        with open(self.chemin, "ab") as fichier:
+            fichier.write(bloc.tobytes())
+        self._nb_ecrites += len(bloc)
+        self._colonnes = {nom: array("i") for nom in TRANSITION.names}
+    
+    def transitions(self):
+        self.vide_tampon()
+        if self._nb_ecrites == 0:
+            return np.zeros(0, dtype=TRANSITION)
+        return np.memmap(self.chemin, dtype=TRANSITION, mode="r", shape=(self._nb_ecrites,))
+
+
+#Evénements d'un pas de simulation renvoyés par reseau.simulation_flux(). Chaque champ
+#(sauf pas) est un tableau d'int32 : couples (entité, info) à 2 colonnes pour injections,
+#receptions, consultations, appreciations, transferts et expirations (info plus
+#consultable), identifiants des informations mortes pendant le pas pour mortes.
+EvenementsPas = namedtuple("EvenementsPas", ("pas", "injections", "receptions", "consultations", "appreciations",
+                                             "transferts", "expirations", "mortes"))
+
+
+class HistoriqueFlux(HistoriqueTransitions):
+    """
+    Enregistreur qui ne garde que les transitions et appréciations du pas en
+    cours, rendues puis oubliées à la fin de chaque pas par evenements()
+    (utilisé par reseau.simulation_flux).
+    Une information reçue par une entité pour laquelle elle n'est jamais
+    consultable (pas_max_info nul) est comptée comme expiration.
+    """
+    
+    def __init__(self):
+        HistoriqueTransitions.__init__(self)
+        self._appreciations = array("i")
+    
+    def enregistre_appreciation(self, entite, info):
+        self._appreciations.append(entite)
+        self._appreciations.append(info)
+    
+    def evenements(self, pas, injections, mortes):
+        """
+        Arguments :
+            - pas : le pas qui vient d'être simulé (int)
+            - injections : couples (entité, info) injectés pendant le pas (liste)
+            - mortes : identifiants des informations mortes pendant le pas (liste)
+        Objectif :
+        Renvoie les événements du pas (EvenementsPas) et vide l'enregistreur
+        """
+        transitions = HistoriqueTransitions.transitions(self)
+        couples = np.column_stack((transitions["entite"], transitions["info"]))
+        etat = transitions["etat"]
+        evenements = EvenementsPas(pas, np.array(injections, dtype=np.int32).reshape(-1, 2), couples[etat > 0],
+                                   couples[etat == ETAT_CONSULTEE], np.frombuffer(self._appreciations, dtype=np.int32).reshape(-1, 2).copy(),
+                                   couples[etat == ETAT_TRANSFEREE], couples[etat == 0], np.array(sorted(mortes), dtype=np.int32))
+        self._colonnes = {nom: array("i") for nom in TRANSITION.names}
+        self._appreciations = array("i")
+        return evenements
+
+
+class Instrumentation(object):
+    """
+    Mesures d'une simulation, à passer à reseau.simulation (argument instrumentation).
+    
+    Attributs :
+        - temps : temps cumulé (s) de chaque phase de PHASES (dictionnaire)
+        - compteurs : pour chaque pas, un dictionnaire (clés "pas" et COMPTEURS) des
+        informations reçues par une entité, consultations, appréciations,
+        transferts et informations mortes pendant le pas (liste)
+        - rappel : fonction appelée à la fin de chaque pas avec le dictionnaire
+        des compteurs du pas et l'instance d'Instrumentation, pour exporter les
+        mesures (fonction ou None)
+        
+    Sans instrumentation, simulation() ne fait qu'un test par phase et par pas.
+    Les compteurs sont calculés à partir des compteurs des informations
+    (nb_recues, nb_consult, nb_appr, nb_transferts), en O(nombre d'informations)
+    par pas.
+    """
+    
+    PHASES = ("injection", "manipulation", "mort", "historique")
+    COMPTEURS = ("infos_recues", "consultations", "appreciations", "transferts", "infos_mortes")
+    
+    def __init__(self, rappel=None):
+        self.rappel = rappel
+        self.temps = dict.fromkeys(self.PHASES, 0.)
+        self.compteurs = []
+        self._dernier_top = None
+        self._totaux = (0, 0, 0, 0)
+    
+    def debut_pas(self):
+        """
+        Objectif :
+        Démarre le chronomètre du pas
+        """
+        self._dernier_top = time.perf_counter()
+    
+    def top(self, phase):
+        """
+        Argument :
+            - phase : nom de la phase qui vient de se terminer (str de PHASES)
+        Objectif :
+        Ajoute au temps de la phase le temps écoulé depuis le dernier top
+        """
+        maintenant = time.perf_counter()
+        self.temps[phase] += maintenant-self._dernier_top
+        self._dernier_top = maintenant
+    
+    def fin_pas(self, pas, infos, nb_mortes):
+        """
+        Arguments :
+            - pas : le pas qui se termine (int)
+            - infos : les informations de la simulation (liste)
+            - nb_mortes : nombre d'informations mortes pendant le pas (int)
+        Objectif :
+        Calcule les compteurs du pas, les ajoute à compteurs et appelle le rappel
+        """
+        totaux = (sum(i.nb_recues for i in infos), sum(i.nb_consult for i in infos),
+                  sum(i.nb_appr for i in infos), sum(i.nb_transferts for i in infos))
+        compteurs_pas = {"pas": pas}
+        compteurs_pas.update(zip(self.COMPTEURS, [t-t0 for t, t0 in zip(totaux, self._totaux)]+[nb_mortes]))
+        self._totaux = totaux
+        self.compteurs.append(compteurs_pas)
+        if self.rappel is not None:
+            self.rappel(compteurs_pas, self)
+    
+    def totaux(self):
+        """
+        Objectif :
+        Renvoie la somme sur tous les pas de chaque compteur (dictionnaire)
+        """
+        return {nom: sum(c[nom] for c in self.compteurs) for nom in self.COMPTEURS}
+
+
+class VueVoisins(object):
+    """
+    Vue sur les voisins d'une entité rattachée à un réseau.
+    
+    Les voisins sont stockés par le réseau au format CSR (voisins_debut,
+    voisins_indices) : la vue ne contient pas de liste, elle se comporte comme
+    la liste des instances des voisins (itération, len, in, indexation, append).
+    """
+    
+    def __init__(self, reseau, rang):
+        """
+        Arguments :
+            - reseau : le réseau qui stocke l'adjacence (reseau)
+            - rang : l'identifiant de l'entité (int)
+        """
+        self.reseau = reseau
+        self.rang = rang
+    
+    def indices(self):
+        """
+        Objectif :
+        Renvoie les identifiants des voisins (np.array d'entiers, sans copie)
+        """
+        debut = self.reseau.voisins_debut
+        return self.reseau.voisins_indices[debut[self.rang]:debut[self.rang+1]]
+    
+    def __len__(self):
+        return int(self.reseau.voisins_debut[self.rang+1]-self.reseau.voisins_debut[self.rang])
+    
+    def __iter__(self):
+        entites = self.reseau.liste_entites
+        for j in self.indices().tolist():
+            yield entites[j]
+    
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.reseau.liste_entites[j] for j in self.indices()[i].tolist()]
+        return self.reseau.liste_entites[int(self.indices()[i])]
+    
+    def __contains__(self, entite):
+        if entite.reseau is not self.reseau:
+            return False
+        return bool((self.indices() == entite.id).any())
+    
+    def __eq__(self, autre):
+        return list(self) == list(autre)
+    
+    def __ne__(self, autre):
+        return not self == autre
+    
+    def __repr__(self):
+        return "VueVoisins(" + str(self.indices().tolist()) + ")"
+    
+    def append(self, entite):
+        """
+        Objectif :
+        Ajoute l'entité en argument aux voisins (reconstruit l'adjacence, O(nb d'arêtes))
+        """
+        self.reseau.remplace_voisins(self.rang, np.append(self.indices(), entite.id))
+
+
+
+class CacheDistances(object):
+    """
+    Service de distances d'un réseau : le tableau des distances depuis une
+    entité (parcours en largeur complet, voir _parcours_largeur) est calculé une
+    fois puis gardé dans un cache LRU borné en mémoire.
+    
+    Attributs :
+        - reseau (reseau)
+        - budget_octets (int)
+        - tableaux (OrderedDict)
+        - octets (int)
+        - nb_trouves, nb_calcules (int)
+    
+    Méthodes :
+        - __init__(self, reseau, budget_octets) :
+        Initialise les attributs
+        - distances_depuis(self, source) :
+        Renvoie les distances de la source à toutes les entités
+        - distance(self, source, cible) :
+        Renvoie la distance de la source à la cible
+        - vide(self) :
+        Vide le cache
+    """
+    
+    def __init__(self, reseau, budget_octets=64*2**20):
+        """
+        Arguments :
+            - reseau : le réseau dont on calcule les distances (reseau)
+            - budget_octets : mémoire maximale occupée par les tableaux gardés (int)
+        Objectif :
+        Initialise les attributs :
+            - tableaux : tableaux de distances gardés, indexés par la source, du
+            moins récemment utilisé au plus récent (OrderedDict)
+            - octets : mémoire occupée par ces tableaux (int)
+            - nb_trouves, nb_calcules : nombres de demandes servies par le cache
+            et de parcours calculés (int)
+        """
+        self.reseau = reseau
+        self.budget_octets = budget_octets
+        self.tableaux = OrderedDict()
+        self.octets = 0
+        self.nb_trouves = 0
+        self.nb_calcules = 0
+        self._adjacence = None
+    
+    def vide(self):
+        """
+        Objectif :
+        Oublie tous les tableaux de distances gardés
+        """
+        self.tableaux.clear()
+        self.octets = 0
+    
+    def distances_depuis(self, source):
+        """
+        Argument :
+            - source : identifiant de l'entité de départ (int)
+        Objectif :
+        Renvoie les distances de la source à toutes les entités, -1 pour celles
+        qui ne sont pas atteignables (np.array en lecture seule). Le cache est vidé
+        si l'adjacence du réseau a changé depuis le dernier appel (remplace_voisins
+        ou nouveaux tableaux voisins_debut, voisins_indices).
+        """
+        adjacence = (self.reseau.version_voisins, id(self.reseau.voisins_debut), id(self.reseau.voisins_indices))
+        if adjacence != self._adjacence:
+            self.vide()
+            self._adjacence = adjacence
+        
+        distances = self.tableaux.get(source)
+        if distances is not None:
+            self.tableaux.move_to_end(source)
+            self.nb_trouves += 1
+            return distances
+        
+        distances = _parcours_largeur(self.reseau.voisins_debut, self.reseau.voisins_indices, source)
+        distances.setflags(write=False)
+        self.nb_calcules += 1
+        if distances.nbytes <= self.budget_octets:
+            #On retire les tableaux les moins récemment utilisés jusqu'à avoir la place
+            while self.octets + distances.nbytes > self.budget_octets:
+                self.octets -= self.tableaux.popitem(last=False)[1].nbytes
+            self.tableaux[source] = distances
+            self.octets += distances.nbytes
+        return distances
+    
+    def distance(self, source, cible):
+        """
+        Arguments :
+            - source, cible : identifiants des entités (int)
+        Objectif :
+        Renvoie la longueur du plus court chemin de la source à la cible, -1 s'il
+        n'y en a pas (int)
+        """
+        return int(self.distances_depuis(source)[cible])
 
 
 
@@ -19,22 +1224,29 @@ class Entite(object):
     Classe décrivant une entité du réseau.
     
     Attributs : 
-        - id (str(int))
+        - id (int)
         - p_conn, p_trans, p_cons, p_app (float)
-        - voisins (liste)
+        - voisins (liste, ou VueVoisins si l'entité appartient à un réseau)
+        - reseau (reseau ou None)
+        - historique (HistoriqueVide ou None)
         - pas_max (int)
-        - liste_instances_infos (liste)
+        - instances_infos (dictionnaire)
         - infos_recues (dictionnaire)
+        - infos_actives (dictionnaire)
         
     Méthodes :
-        - __init__(self, ID, groupe, bp_seuil, mp_seuil) :
+        - __init__(self, ID, groupe, bp_seuil, mp_seuil, aleas) :
         Initialise tous les attributs, et notamment p_appr selon le groupe auquel
         appartient l'entité
+        - alloue_infos(self) :
+        Crée les dictionnaires d'informations de l'entité à sa première information
+        - tire_probabilites(self, groupe, bp_seuil, mp_seuil, aleas) :
+        Tire p_cons, p_trans et p_app
         - envoie_info(self,info) :
         Envoie l'information en argument à tous les voisins de l'entité
         - recoie_info(self,info) :
         Stocke l'identifiant et l'instance de l'information en argument dans infos_recues
-        et liste_instances_infos
+        et instances_infos
         - manipule_info(self) :
         Pour chaque information encore consultable, diminue le temps (en pas) qui lui
         reste pour être consultée de 1 et teste si elle est consultée et/ou appréciée.
@@ -43,52 +1255,118 @@ class Entite(object):
         - distance(self,entite2,pas_seuil) :
         Calcule la distance entre cette entité et celle en argument (i.e. le nombre 
         d'entités qui les sépare)
+    
+    Les attributs sont des __slots__ (pas de __dict__ par entité).
     """
     
-    def __init__(self, ID, groupe, bp_seuil, mp_seuil):
+    __slots__ = ("id", "p_conn", "p_cons", "p_trans", "p_app", "reseau", "_voisins", "historique", "pas_max",
+                 "infos_recues", "instances_infos", "infos_actives")
+    
+    def __init__(self, ID, groupe, bp_seuil, mp_seuil, aleas=None):
         
         """
         Arguments : 
-             - ID : l'identifiant de l'entité str(int)
+             - ID : l'identifiant de l'entité, son rang dans reseau.liste_entites (int)
              - groupe : groupe auquel appartient l'entité, définit sa proba d'appréciation (str)
              - bp_seuil et mp_seuil : seuils définissant la p_appr (float e [0,1])
+             - aleas : itérateur de nombres uniformes dans [0,1[ où prendre les 4
+             probabilités de l'entité, None pour le module random (itérateur ou None)
             
         Objectifs : 
          - Initialise les attributs :
             
-            - ID : ID de l'entité (str(int))
+            - id : ID de l'entité (int)
             - p_conn (probabilité de connexion), p_cons (probabilité de consulter), 
             p_trans 'probabilité de transférer) (float)
             - p_app (probabilité d'apprécier) selon les groupes renseignés en entrée (float)
-            - self.voisins : liste des voisins de l'entité (liste)
+            - self.voisins : liste des voisins de l'entité (liste). Une fois
+            l'entité rattachée à un réseau (attribut reseau), c'est une vue
+            (VueVoisins) sur l'adjacence stockée par le réseau et la liste est libérée.
             - pas_max : le temps maximum pour lequel une information est consultable
             par l'entité (int)
-            -liste_instances_infos : la liste des instances des informations
-            que l'entité a reçu, initialisé à la liste vide (liste)
+            - historique : l'enregistreur d'historique de la simulation en cours,
+            auquel l'entité signale les changements d'état de ses informations
+            (HistoriqueVide ou None)
+            - instances_infos : le dictionnaire des instances des informations
+            que l'entité a reçu, indexées par leur identifiant (dictionnaire).
+            Comme infos_recues et infos_actives, c'est le dictionnaire vide en
+            lecture seule _AUCUNE_INFO tant que l'entité n'a rien reçu (voir alloue_infos)
             
             - info_recues : le dictionnaire dont les clés sont les identifiants
-            des informations reçues et les valeurs le pas de temps qu'il reste
-            à chaque information pour être consultée (dictionnaire). Si une information présente
-            dans ce dictionnaire a comme valeur 0, elle n'est plus consultable
-            ni recevable. Si l'information est consultée, elle prend comme valeur
-            'consult'. Si elle est transférée, elle prend comme valeur 'transfere'.
+            des informations reçues et les valeurs le code d'état de l'information
+            (int, voir ETAT_*) : le pas de temps qu'il reste à chaque information
+            pour être consultée. Si une information présente dans ce dictionnaire
+            a comme valeur 0, elle n'est plus consultable ni recevable. Si
+            l'information est consultée, elle prend comme valeur ETAT_CONSULTEE.
+            Si elle est transférée, elle prend comme valeur ETAT_TRANSFEREE.
+            
+            - infos_actives : les identifiants des informations encore consultables
+            ou consultées et pas encore transférées, i.e. que manipule_info() doit
+            encore traiter, dans l'ordre de réception (dictionnaire dont les valeurs
+            sont None). Quand il n'est plus vide, l'entité le signale à son réseau
         """
         
-        self.id = ID
-        self.p_conn = random()
-        self.p_cons = random()
-        self.p_trans = random()
-        self.voisins = []
+        self.id = int(ID)
+        self.p_conn = random() if aleas is None else next(aleas)
+        self.reseau = None
+        self._voisins = []
+        self.historique = None
         self.pas_max = 0
-        self.infos_recues = {}
-        self.liste_instances_infos = []
+        self.infos_recues = _AUCUNE_INFO
+        self.instances_infos = _AUCUNE_INFO
+        self.infos_actives = _AUCUNE_INFO
+        self.tire_probabilites(groupe, bp_seuil, mp_seuil, aleas)
+    
+    
+    def alloue_infos(self):
+        """
+        Objectif :
+        Remplace les dictionnaires vides partagés infos_recues, instances_infos et
+        infos_actives par des dictionnaires propres à l'entité, avant d'y écrire.
+        """
+        if self.infos_recues is _AUCUNE_INFO:
+            self.infos_recues = {}
+            self.instances_infos = {}
+            self.infos_actives = {}
+    
+    
+    def tire_probabilites(self, groupe, bp_seuil, mp_seuil, aleas=None):
+        """
+        Arguments :
+            - groupe, bp_seuil, mp_seuil, aleas : voir __init__
+        
+        Objectif :
+        Tire p_cons, p_trans et p_app (selon le groupe) de l'entité. p_conn, qui
+        définit les connexions du réseau, n'est pas modifiée.
+        """
+        tire = random if aleas is None else aleas.__next__
+        self.p_cons = tire()
+        self.p_trans = tire()
         
         if groupe=="bp":
             seuil=bp_seuil
-            self.p_app=random()*(1-seuil)+seuil
+            self.p_app=tire()*(1-seuil)+seuil
         elif groupe=="mp":
             seuil=mp_seuil
-            self.p_app=random()*seuil
+            self.p_app=tire()*seuil
+    
+    
+    @property
+    def voisins(self):
+        """
+        Liste des voisins de l'entité, ou vue sur l'adjacence du réseau si
+        l'entité lui est rattachée.
+        """
+        if self.reseau is None:
+            return self._voisins
+        return VueVoisins(self.reseau, self.id)
+    
+    @voisins.setter
+    def voisins(self, liste):
+        if self.reseau is None:
+            self._voisins = list(liste)
+        else:
+            self.reseau.remplace_voisins(self.id, [vois.id for vois in liste])
         
         
         
@@ -114,11 +1392,21 @@ class Entite(object):
         Ajoute l'identitifant de information en entrée dans le dictionnaire 
         info_recues avec comme valeur le nombre de pas qu'il reste à l'information 
         pour être encore consultable. Ajoute également l'instance de l'information
-        dans le liste liste_instances_infos.
+        dans le dictionnaire instances_infos.
         """
         if info.id not in self.infos_recues :
+            self.alloue_infos()
             self.infos_recues[info.id]=self.pas_max
-            self.liste_instances_infos.append(info)
+            self.instances_infos[info.id]=info
+            info.nb_recues += 1
+            if self.pas_max == 0:
+                info.nb_zero += 1
+            else:
+                self.infos_actives[info.id]=None
+                if len(self.infos_actives) == 1 and self.reseau is not None:
+                    self.reseau.active_entite(self.id)
+            if self.historique is not None:
+                self.historique.enregistre(self.id, info.id, self.pas_max)
         
         
         
@@ -134,49 +1422,55 @@ class Entite(object):
          
          - Pour chaque information déjà consultée, teste si elle est transférée
          aux voisins de l'entité. 
+         
+        Seules les informations de infos_actives sont parcourues : les autres
+        (plus consultables ou déjà transférées) n'ont plus rien à faire. Les
+        tirages sont pris dans reseau.tire (random par défaut).
         """
         
-        for i in self.infos_recues.keys():
+        tire = random if self.reseau is None else self.reseau.tire
+        infos_recues = self.infos_recues
+        actives = self.infos_actives
+        for i in list(actives):
             
-            #On récupère l'instance d'information qui correspond à l'identifiant
-            #présent dans la clé du dictionnaire 
-            for j in self.liste_instances_infos:
-                if j.id == i:
-                    info = j
-            
-            #On actualise le nombre de pas restant à l'info pour être consultable        
-            if self.infos_recues[i] != 0 and self.infos_recues[i] != "consult" and self.infos_recues[i] != "transfere": #Si l'info est encore consultable
-                self.infos_recues[i]=self.infos_recues[i]-1
+            #On actualise le nombre de pas restant à l'info pour être consultable
+            if infos_recues[i] > 0: #Si l'info est encore consultable
+                infos_recues[i] -= 1
                 
-            if self.infos_recues[i] != 0 and self.infos_recues[i] != "consult" and self.infos_recues[i] != "transfere": #Si l'info est encore consultable
+                if infos_recues[i] == 0:
+                    self.instances_infos[i].nb_zero += 1
+                    del actives[i]
+                    if self.historique is not None:
+                        self.historique.enregistre(self.id, i, 0)
                 
                 #On teste si elle est consultée ou non
-                alea = random()
-                if alea<self.p_cons: 
+                elif tire() < self.p_cons:
+                    info = self.instances_infos[i]
                     info.consult(self.id)
-                    self.infos_recues[info.id] = "consult"
+                    infos_recues[i] = ETAT_CONSULTEE
+                    if self.historique is not None:
+                        self.historique.enregistre(self.id, i, ETAT_CONSULTEE)
                     
                     #On teste, si elle est consultée, si elle est appréciée ou non
-                    alea = random()
-                    if alea<self.p_app:
+                    if tire() < self.p_app:
                         info.apprecie(self.id)
-
+                        if self.historique is not None:
+                            self.historique.enregistre_appreciation(self.id, i)
         
         
-        for i in self.infos_recues.keys():
-            
-            if self.infos_recues[i] == "consult": #Pour chaque info consultée
-                for j in self.liste_instances_infos:
-                    if j.id == i:
-                        info = j
+        for i in list(actives):
             
-            #On teste si elle est transférée ou non
-                alea = random()
-                if alea<self.p_trans:
-                
-                    for j in self.voisins:
-                        j.recoie_info(info)
-                        self.infos_recues[info.id] = "transfere"
+            #Pour chaque info consultée, on teste si elle est transférée ou non
+            if infos_recues[i] == ETAT_CONSULTEE and tire() < self.p_trans:
+                info = self.instances_infos[i]
+                for j in self.voisins:
+                    j.recoie_info(info)
+                    infos_recues[i] = ETAT_TRANSFEREE
+                if infos_recues[i] == ETAT_TRANSFEREE:
+                    del actives[i]
+                    info.nb_transferts += 1
+                    if self.historique is not None:
+                        self.historique.enregistre(self.id, i, ETAT_TRANSFEREE)
 
                     
         
@@ -188,26 +1482,33 @@ class Entite(object):
             
         Objectif :
         Donne la plus courte distance entre l'entité et une autre entité du réseau
-        grâce à un algorithme de parcours d'arbre en largeur.
+        grâce à un algorithme de parcours d'arbre en largeur (chaque entité n'est
+        visitée qu'une fois).
         Renvoie d ayant pour valeur :
-            - distance d entre l'entité et entité 2 si il existe un chemin entre elles (int)
+            - distance d entre l'entité et entité 2 si il existe un chemin entre elles
+            de longueur au plus pas_seuil (int)
             - 0 sinon (int)
         """
-        pas=pas_seuil
-        #print("entite"+self.id+"  voisins :")
-        nod1=self.voisins
-        nod2=[]
+        if self.reseau is not None and entite2.reseau is self.reseau:
+            d = self.reseau.cache_distances.distance(self.id, entite2.id)
+            return d if 0 < d <= pas_seuil else 0
+        
+        nod1=list(self.voisins)
+        visitees=set()
         d=1
-        while entite2 not in nod1 and nod1!=[] and pas!=0:
-            pas=pas-1
+        while nod1!=[] and d<=pas_seuil:
+            if entite2 in nod1:
+                return(d)
+            visitees.update(id(a) for a in nod1)
+            nod2=[]
             for a in nod1:
-                nod2.extend(a.voisins)
+                for b in a.voisins:
+                    if id(b) not in visitees:
+                        visitees.add(id(b))
+                        nod2.append(b)
             d=d+1
             nod1=nod2
-            nod2=[]
-        if nod1==[] or pas==0:
-            d=0
-        return(d)
+        return(0)
                    
         
         
@@ -221,19 +1522,30 @@ class information(object):
     
     Attributs :
         - id (int)
-        - dico_consult_appr (dictionnaire)
+        - consultations (array d'int)
+        - appreciations (bytearray)
+        - dico_consult_appr (dictionnaire, calculé)
         - temps_reseau (int)
+        - pas_debut (int ou None)
+        - nb_recues, nb_zero, nb_consult, nb_appr, nb_transferts (int)
+        - pic_visibles (int)
     
     Méthodes :
         - __init__(self,ID) :
         Initialise les attributs
         - consult(self,entite_id) :
-        Stocke l'identifiant de l'entité en argument dans le dico_consult_appr en tant
-        que clé et assigne 0 en valeur par défaut
+        Ajoute l'identifiant de l'entité en argument aux consultations, non appréciée
         - apprecie(self,entite_id) :
-        Assigne 1 comme valeur dans dico_consult_appr à l'entité en argument
+        Marque comme appréciée la consultation de l'entité en argument
+        - est_morte(self,nb_entites) :
+        Indique si l'information n'est plus consultable par aucune entité
+    
+    Les attributs sont des __slots__ (pas de __dict__ par information).
     """
     
+    __slots__ = ("id", "consultations", "appreciations", "temps_reseau", "pas_debut", "nb_recues", "nb_zero",
+                 "nb_consult", "nb_appr", "nb_transferts", "pic_visibles")
+    
     def __init__(self,ID):
         """
         Agument : 
@@ -242,53 +1554,233 @@ class information(object):
         Objectif :
         Initialise les attributs:
             - id : l'identifiant de l'information (int)
-            - dico_consult_appr : un dictionnaire qui contiendra en clés les id des
-            entités qui ont consulté cette information et en valeur si elles l'ont 
-            appréciées au non (1 si appréciée et 0 sinon) (dictionnaire)
+            - consultations : les id des entités qui ont consulté cette information,
+            dans l'ordre des consultations (array d'int)
+            - appreciations : pour chaque consultation, 1 si l'entité a apprécié
+            l'information et 0 sinon (bytearray)
             - temps_reseau : le temps que l'information a passé dans le réseau,
             initialisé à la valeur 0 et calculé dans reseau (int)
+            - pas_debut : le pas auquel l'information a été envoyée dans le réseau,
+            None tant qu'elle ne l'a pas été (int ou None)
+            - nb_recues, nb_zero, nb_consult : compteurs, tenus à jour par les entités,
+            des entités qui ont reçu l'information, de celles pour lesquelles elle
+            n'est plus consultable (valeur 0) et de celles qui l'ont consultée (et
+            éventuellement transférée) (int)
+            - nb_appr, nb_transferts : nombre d'entités qui l'ont appréciée et
+            qui l'ont transférée (int)
+            - pic_visibles : nombre maximal d'entités pour lesquelles l'information
+            était visible (consultable ou consultée et pas transférée) en même temps,
+            relevé à la fin de chaque pas par reseau (int)
         """
         
         self.id = ID
-        self.dico_consult_appr = {}
+        self.consultations = array("i")
+        self.appreciations = bytearray()
         self.temps_reseau = 0
+        self.pas_debut = None
+        self.nb_recues = 0
+        self.nb_zero = 0
+        self.nb_consult = 0
+        self.nb_appr = 0
+        self.nb_transferts = 0
+        self.pic_visibles = 0
         
 
+    @property
+    def dico_consult_appr(self):
+        """
+        Dictionnaire dont les clés sont les id des entités qui ont consulté
+        l'information et les valeurs si elles l'ont appréciée (1) ou non (0),
+        reconstruit à partir de consultations et appreciations.
+        """
+        return dict(zip(self.consultations, self.appreciations))
+    
+    
     def consult(self,entite_id):
         """
         Argument : 
-        entite_id : l'id de l'entite considérée (attribut de entité) (str(int))
+        entite_id : l'id de l'entite considérée (attribut de entité) (int)
             
         Objectif :
-        Stocke dans un dico les entités qui l'ont consultée, en initialisant
-        la valeur à 0 pour chacune d'elles.
+        Ajoute l'entité aux consultations de l'information, pour l'instant non
+        appréciée.
         """
         
-        self.dico_consult_appr[entite_id]=0
-
-        #stocke dans un dico les entités qui l'ont apprécié ce qui donne 
-        #par def pour les valeurs non nulles les entités qui l'ont consultées
-        #met tout dans l'attribut self.dico_consult_appr -> standard 0 et si apprécié 1
+        self.consultations.append(entite_id)
+        self.appreciations.append(0)
+        self.nb_consult += 1
         
     
     def apprecie(self,entite_id):
         """
         Argument : 
-        Entite_id : l'id de l'entite considérée (str(int))
+        Entite_id : l'id de l'entite considérée (int)
             
         Objectif : 
-        Stocke dans le dico des entités qui ont consultée l'information des 1 pour celles qui
-        l'ont appréciées.
+        Marque comme appréciée la consultation de l'entité, en général la dernière.
         Si la fonction est invoquée on sait que l'information a été appréciée
         """
         
-        self.dico_consult_appr[entite_id]+=1
+        rang = len(self.consultations)-1
+        if self.consultations[rang] != entite_id:
+            rang = self.consultations.index(entite_id)
+        self.appreciations[rang] = 1
+        self.nb_appr += 1
+    
+    
+    def est_morte(self,nb_entites):
+        """
+        Argument :
+        nb_entites : le nombre d'entités du réseau (int)
+        
+        Objectif :
+        Renvoie True si l'information est "morte" : toutes les entités l'ont reçue
+        et l'ont consultée et/ou transférée, ou elle n'est plus consultable pour
+        toutes les entités qui l'ont reçue. Lit seulement les compteurs (O(1)).
+        """
+        if self.nb_recues == nb_entites and self.nb_consult == self.nb_recues:
+            return True
+        return self.nb_zero == self.nb_recues
+        
+             
+      
+      
+      
+            
+        
+#colonnes du tableau des résultats par information (ResultatsInfos) et leur type
+COLONNES_RESULTATS = (("id", np.int32), ("temps_reseau", np.int64), ("nb_consult", np.int64),
+                      ("nb_appr", np.int64), ("portee", np.int64), ("pic_visibles", np.int64))
+
+
+class ResultatsInfos(object):
+    """
+    Classe décrivant les résultats d'une simulation par information, rangés en
+    colonnes : un tableau numpy typé par caractéristique (voir COLONNES_RESULTATS).
+    
+    Attributs :
+        - colonnes (dictionnaire)
+        - proprietes : caractéristiques du réseau écrites avec les résultats, par
+        exemple {"diametre": 5} (dictionnaire {nom : int})
+    
+    Méthodes :
+        - __init__(self, colonnes) :
+        Initialise les attributs
+        - depuis_infos(cls, infos) :
+        Construit le tableau à partir des instances d'information
+        - concatene(cls, liste) :
+        Met bout à bout les résultats de plusieurs simulations
+        - charge(cls, chemin) :
+        Lit des résultats écrits par ecrit()
+        - ecrit(self, chemin) :
+        Ecrit les résultats en CSV ou en NPZ selon l'extension du fichier
+        - tableau(self) :
+        Renvoie les résultats sous forme d'un tableau d'entiers
+    """
+    
+    def __init__(self, colonnes):
+        """
+        Argument :
+            - colonnes : dictionnaire {nom de colonne: tableau} avec les noms de
+            COLONNES_RESULTATS, les tableaux sont convertis dans le type de la colonne
+        """
+        self.colonnes = {nom: np.asarray(colonnes[nom], dtype=type_colonne) for nom, type_colonne in COLONNES_RESULTATS}
+        self.proprietes = {}
+    
+    
+    @classmethod
+    def depuis_infos(cls, infos):
+        """
+        Argument :
+            - infos : liste d'instances d'information (liste)
+        Objectif :
+        Lit en un seul passage par colonne les compteurs tenus à jour pendant la
+        simulation : consultations (nb_consult), appréciations (nb_appr), portée
+        (nombre d'entités qui ont reçu l'information, nb_recues) et pic_visibles.
+        """
+        attributs = {"id": "id", "temps_reseau": "temps_reseau", "nb_consult": "nb_consult",
+                     "nb_appr": "nb_appr", "portee": "nb_recues", "pic_visibles": "pic_visibles"}
+        return cls({nom: np.fromiter((getattr(i, attributs[nom]) for i in infos), dtype=type_colonne, count=len(infos))
+                    for nom, type_colonne in COLONNES_RESULTATS})
+    
+    
+    @classmethod
+    def concatene(cls, liste):
+        """
+        Argument :
+            - liste : résultats de plusieurs simulations (liste de ResultatsInfos)
+        Objectif :
+        Renvoie un seul ResultatsInfos contenant toutes les lignes, avec en plus
+        une colonne "replication" donnant le rang de la simulation d'origine.
+        """
+        resultats = cls({nom: np.concatenate([r.colonnes[nom] for r in liste] or [np.zeros(0)]) for nom, _ in COLONNES_RESULTATS})
+        resultats.colonnes["replication"] = np.repeat(np.arange(len(liste), dtype=np.int32), [len(r) for r in liste]) if liste else np.zeros(0, dtype=np.int32)
+        return resultats
+    
+    
+    @classmethod
+    def charge(cls, chemin):
+        """
+        Argument :
+            - chemin : fichier .npz ou .csv écrit par ecrit() (str)
+        """
+        if chemin.endswith(".npz"):
+            with np.load(chemin) as donnees:
+                colonnes = {nom: donnees[nom] for nom in donnees.files}
+            #les propriétés sont les tableaux sans dimension
+            proprietes = {nom: int(colonnes.pop(nom)) for nom in list(colonnes) if colonnes[nom].ndim == 0}
+        else:
+            donnees = np.genfromtxt(chemin, delimiter=",", names=True, dtype=np.int64, ndmin=1)
+            colonnes = {nom: donnees[nom] for nom in donnees.dtype.names}
+            #les propriétés sont dans les lignes de commentaire "# nom=valeur" de la fin du fichier
+            with open(chemin) as fichier:
+                proprietes = {nom.strip(): int(valeur) for nom, _, valeur in
+                              (ligne[1:].partition("=") for ligne in fichier if ligne.startswith("#"))}
+        resultats = cls(colonnes)
+        resultats.proprietes = proprietes
+        if "replication" in colonnes:
+            resultats.colonnes["replication"] = np.asarray(colonnes["replication"], dtype=np.int32)
+        return resultats
+    
+    
+    def __len__(self):
+        return len(self.colonnes["id"])
+    
+    
+    def __getitem__(self, nom):
+        return self.colonnes[nom]
+    
+    
+    def tableau(self):
+        """
+        Objectif :
+        Renvoie les résultats sous forme d'un tableau d'entiers, une ligne par
+        information et une colonne par nom de self.colonnes (np.array)
+        """
+        return np.column_stack([self.colonnes[nom].astype(np.int64) for nom in self.colonnes]) if len(self) else np.zeros((0, len(self.colonnes)), dtype=np.int64)
+    
+    
+    def ecrit(self, chemin):
+        """
+        Argument :
+            - chemin : fichier de sortie, en NPZ (colonnes typées) si son nom finit
+            par .npz, en CSV sinon (str). Les propriétés sont écrites en tableaux
+            sans dimension dans le NPZ, en lignes "# nom=valeur" à la fin du CSV.
+        """
+        if chemin.endswith(".npz"):
+            np.savez(chemin, **self.colonnes, **{nom: np.int64(valeur) for nom, valeur in self.proprietes.items()})
+        else:
+            np.savetxt(chemin, self.tableau(), fmt="%d", delimiter=",", comments="", header=",".join(self.colonnes),
+                       footer="\n".join("# %s=%d" % (nom, valeur) for nom, valeur in self.proprietes.items()))
+    
+    
+    def __str__(self):
+        lignes = [list(self.colonnes)] + self.tableau().astype(str).tolist()
+        largeurs = [max(len(ligne[c]) for ligne in lignes) for c in range(len(lignes[0]))]
+        return "\n".join(" ".join(v.rjust(l) for v, l in zip(ligne, largeurs)) for ligne in lignes)
+        
+        
         
-             
-      
-      
-      
-            
         
 class reseau(object):
     """
@@ -297,33 +1789,77 @@ class reseau(object):
     Attributs : 
         - taille (int)
         - liste_entites (liste)
+        - entites_actives (ensemble)
+        - voisins_debut, voisins_indices (np.array)
         - liste_infos (liste)
         - liste_infos_restantes (liste)
         - liste_infos_envoyees (liste)
-        - liste_infos_consultables (liste)
+        - liste_infos_consultables (ensemble)
         - dico_general (dictionnaire)
+        - historique (HistoriqueVide ou None)
         - diametre (int)
+        - diametre_bornes (tuple)
+        - rng (numpy.random.Generator)
+        - tire (fonction)
+        - version_voisins (int)
+        - cache_distances (CacheDistances)
         
     Méthodes : 
-        - __init__(self,nb_entites, groupes, bp_seuil,mp_seuil) :
+        - __init__(self,nb_entites, groupes, bp_seuil,mp_seuil, graine, topologie) :
         Initialise les attributs et créé le réseau (les entités et les connexions
         entre elles)
-        - calcule_diametre(self) :
+        - depuis_fichier(cls, chemin, groupes, bp_seuil, mp_seuil, graine, binaire, oriente) :
+        Créé un réseau dont les connexions sont lues dans un fichier
+        - ecrit_aretes(self, chemin) :
+        Ecrit les connexions du réseau dans un fichier binaire
+        - reechantillonne_probabilites(self, groupes, bp_seuil, mp_seuil, graine) :
+        Tire de nouvelles probabilités pour les entités sans changer les connexions
+        - reinitialise_simulation(self) :
+        Efface l'état laissé par la dernière simulation
+        - active_entite(self, rang) :
+        Ajoute une entité aux entités actives
+        - remplace_voisins(self, rang, nouveaux) :
+        Remplace les voisins d'une entité dans l'adjacence CSR
+        - distances_depuis(self, rang, pas_max) :
+        Renvoie les distances d'une entité à toutes les autres
+        - distance(self, rang1, rang2) :
+        Renvoie la distance entre deux entités
+        - calcule_diametre(self, mode, processus, nb_balayages, graine) :
         Calcul le diamètre du réseau (i.e. la distance maximale entre 2 entités)
         - dico_general(self,pas) :
-        - graphe(self) :
+        - graphe(self, max_aretes, max_entites, fichier, graine) :
         Créé et affiche un graphe permettant de visualiser le réseau
-        - simulation(self, pas_max_simul, nbre_infos, pas_max_info) :
-        Créé et fait tourner une simulation
-        - graphe_immeuble(self) :
+        - simulation(self, pas_max_simul, nbre_infos, pas_max_info, historique, instrumentation, graine,
+        sauvegarde, periode_sauvegarde, reprise, arrivees) :
+        Créé et fait tourner une simulation, ou reprend une simulation interrompue
+        - simulation_flux(self, pas_max_simul, nbre_infos, pas_max_info, graine, instrumentation, reprise, arrivees) :
+        Fait tourner une simulation pas à pas en renvoyant les événements de chaque pas
+        - sauvegarde(self, chemin) :
+        Ecrit un point de reprise de la simulation en cours
+        - depuis_sauvegarde(cls, chemin) :
+        Recrée un réseau et l'état de sa simulation depuis un point de reprise
+        - simulation_vectorisee(self, pas_max_simul, nbre_infos, pas_max_info, graine, historique, arrivees) :
+        Même simulation que simulation() mais avec l'état du réseau stocké dans
+        des tableaux numpy
+        - simulation_parallele(self, pas_max_simul, nbre_infos, pas_max_info, processus, graine, historique,
+        arrivees) :
+        Même simulation que simulation_vectorisee() répartie entre plusieurs
+        processus par tranches d'entités, l'état étant en mémoire partagée
+        - vues_historique(self) :
+        Renvoie les vues pas à pas de la dernière simulation (comme dict_general)
+        - graphe_immeuble(self, mode, fichier, carte_couleurs) :
         Créé et affiche un graphe récapitulatif de la propagation des informations
         dans la dernière simulation lancée.
-        - bilan(self) :
+        - resultats_infos(self) :
+        Renvoie les caractéristiques des informations en colonnes (ResultatsInfos)
+        - metriques_infos(self) :
+        Renvoie les caractéristiques des informations affichées par bilan()
+        - bilan(self, graphiques, fichier) :
         Affiche un bilan de toutes les informations du réseau et de la dernière
         simulation lancée.
     """
     
-    def __init__(self,nb_entites, groupes, bp_seuil,mp_seuil):
+    def __init__(self,nb_entites, groupes, bp_seuil,mp_seuil, graine=None, topologie=None):
         """
         Arguments:
             - nb_entites : nombre d'entités que le réseau contient (int)
@@ -331,56 +1867,305 @@ class reseau(object):
             - bp_seuil : seuil de probabilité minimum tel que les proba d'appréciation des entités bon public soient
             comprises dans [mp_seuil:1]                                 (float)
             - mp_seuil : même définition que bp_seuil dans [0:bp_seuil]
+            - graine : graine du tirage des connexions (int, numpy.random.Generator ou None).
+            Si elle est renseignée, les probabilités des entités sont aussi tirées
+            avec ce générateur (en un seul bloc), sinon avec le module random, dont
+            est aussi tirée la graine du générateur des connexions.
+            - topologie : fonction (nb_entites, rng) -> (voisins_debut, voisins_indices)
+            qui tire les connexions, par exemple topologie_barabasi_albert ou
+            functools.partial(topologie_watts_strogatz, k=6, p=0.05), None pour le
+            modèle p_conn (fonction ou None)
 
         Objectifs :
          - Initialise les arguments :
             - taille : nombre d'entités (int)
-            - liste_entites : dico des entités renseignées par leur identifiant en str(int) (liste)
+            - liste_entites : les entités, rangées par identifiant entier (liste)
+            - entites_actives : identifiants des entités qui ont au moins une information
+            à traiter (voir Entite.infos_actives), les seules que simulation() fait
+            tourner (ensemble)
+            - voisins_debut, voisins_indices : adjacence au format CSR, les voisins de
+            l'entité e sont voisins_indices[voisins_debut[e]:voisins_debut[e+1]] (np.array)
             - liste_infos : liste contenant les informations (liste)
-            - liste_infos_restantes : liste contenant les informations pas encore envoyées dans le réseau (liste)
+            - liste_infos_restantes : liste contenant les informations pas encore envoyées dans le réseau,
+            dans un ordre quelconque (les informations envoyées en sont retirées en temps constant) (liste)
             - liste_infos_envoyees : liste contenant les informations envoyées dans le réseau (liste)
-            - liste_infos_consultables : liste des infos envoyées encore consultables par au moins une entité (liste)
+            - liste_infos_consultables : ensemble des infos pas encore envoyées ou encore consultables par au moins une entité (ensemble)
             - dico_general
+            - historique : l'enregistreur d'historique de la dernière simulation,
+            None si elle a rempli dict_general (HistoriqueVide ou None)
             - diametre : distance maximale entre 2 entités du réseau (int)
+            - diametre_bornes : bornes (inf, sup) du diamètre données par le mode
+            approché de calcule_diametre, sup vaut None si elle n'est pas connue (tuple)
+            - rng : le générateur créé à partir de graine, qui peut être repassé à
+            simulation() pour continuer le même flux (numpy.random.Generator)
+            - tire : fonction qui renvoie le prochain nombre aléatoire uniforme
+            utilisé par Entite.manipule_info, random hors simulation (fonction)
+            - version_voisins : nombre de modifications de l'adjacence par
+            remplace_voisins (int)
+            - cache_distances : cache des parcours en largeur, pour distances_depuis,
+            distance et Entite.distance (CacheDistances)
             
          - Créé les entités du réseau en créant des instances d'entités et les relie
-        les unes avec les autres.
+        les unes avec les autres : chaque entité est reliée à chaque entité (elle
+        même comprise) avec la probabilité p_conn. Pour une entité, le nombre de
+        voisins suit donc une loi binomiale et les voisins sont tirés sans remise,
+        ce qui évite de tester chaque paire d'entités. Avec une topologie, ce sont
+        ses connexions qui sont utilisées (p_conn est tirée mais ne sert pas).
         """
         self.taille=nb_entites
-        self.liste_entites={}
+        self.liste_entites=[]
         self.liste_infos=[]
         self.liste_infos_restantes=[]
         self.liste_infos_envoyees=[]
-        self.liste_infos_consultables=[]
+        self.liste_infos_consultables=set()
         self.dict_general={}
+        self.historique = None
+        self.entites_actives = set()
+        #file des entités à faire tourner pendant le pas en cours, et rang de l'entité en cours
+        self._file_pas = None
+        self._rang_courant = -1
         self.diametre = 0
+        self.diametre_bornes = (0, None)
+        self.tire = random
+        self.version_voisins = 0
+        self.cache_distances = CacheDistances(self)
+        rng = None if graine is None else np.random.default_rng(graine)
+        #prochain pas et générateur de la simulation en cours (None pour le module random), pour sauvegarde()
+        self._pas_simulation = 0
+        self._rng_simulation = None
 
         groupes=["bp"]*groupes[0]+["mp"]*groupes[1]
-        #generer les entités
+        #generer les entités, avec les 4 probabilités de chaque entité tirées d'un bloc si on a une graine
+        aleas = None if graine is None else iter(rng.random(4*self.taille).tolist())
         for entite_id in range(self.taille) :
-            self.liste_entites[str(entite_id)]=Entite(str(entite_id),groupes[entite_id],bp_seuil,mp_seuil)
+            self.liste_entites.append(Entite(entite_id,groupes[entite_id],bp_seuil,mp_seuil,aleas))
+        if rng is None:
+            #sans graine, le générateur des connexions est tiré du module random :
+            #random.seed() fixe donc aussi le réseau
+            rng = np.random.default_rng(getrandbits(128))
+        self.rng = rng
         
         #generer les connexions entre entites
-        for entite_id in self.liste_entites:
-            for id_2 in self.liste_entites:
-                if self.liste_entites[id_2] not in self.liste_entites[entite_id].voisins and random()<=self.liste_entites[entite_id].p_conn:
-                    self.liste_entites[entite_id].voisins.append(self.liste_entites[id_2])
+        if topologie is not None:
+            self.voisins_debut, self.voisins_indices = topologie(self.taille, rng)
+        else:
+            p_conn = np.array([ent.p_conn for ent in self.liste_entites])
+            nb_voisins = rng.binomial(self.taille, p_conn)
+            self.voisins_debut = np.zeros(self.taille+1, dtype=np.int64)
+            self.voisins_debut[1:] = np.cumsum(nb_voisins)
+            self.voisins_indices = np.empty(self.voisins_debut[-1], dtype=np.int32)
+            for rang in range(self.taille):
+                self.voisins_indices[self.voisins_debut[rang]:self.voisins_debut[rang+1]] = np.sort(rng.choice(self.taille, nb_voisins[rang], replace=False))
+        
+        for ent in self.liste_entites:
+            ent.reseau = self
+            ent._voisins = None
+        
+        
+    @classmethod
+    def depuis_fichier(cls, chemin, groupes, bp_seuil, mp_seuil, graine=None, binaire=None, oriente=True):
+        """
+        Arguments :
+            - chemin, binaire, oriente : voir lit_aretes et topologie_fichier
+            - groupes : nombres d'entités bon public et mauvais public ; s'ils ne
+            correspondent pas au nombre d'entités du fichier, ils sont pris comme
+            proportions (liste de 2 int)
+            - bp_seuil, mp_seuil, graine : voir __init__
+        Objectif :
+        Renvoie un réseau dont les connexions sont lues dans un fichier de connexions.
+        Le nombre d'entités est le plus grand identifiant du fichier plus un, et les
+        probabilités des entités sont tirées comme dans __init__.
+        """
+        sources, cibles = lit_aretes(chemin, binaire)
+        nb_entites, groupes = _dimensions_aretes(sources, cibles, groupes)
+        if not oriente:
+            sources, cibles = np.concatenate((sources, cibles)), np.concatenate((cibles, sources))
+        return cls(nb_entites, groupes, bp_seuil, mp_seuil, graine=graine,
+                   topologie=lambda n, rng: _csr_depuis_aretes(n, sources, cibles))
+    
+    
+    def ecrit_aretes(self, chemin):
+        """
+        Argument :
+            - chemin : fichier binaire de sortie (str)
+        Objectif :
+        Ecrit les connexions du réseau en paires d'int32 "entité voisin", le format
+        binaire lu par lit_aretes.
+        """
+        paires = np.empty((len(self.voisins_indices), 2), dtype=np.int32)
+        paires[:, 0] = np.repeat(np.arange(self.taille, dtype=np.int32), np.diff(self.voisins_debut))
+        paires[:, 1] = self.voisins_indices
+        paires.tofile(chemin)
+        
+        
+    def reechantillonne_probabilites(self, groupes, bp_seuil, mp_seuil, graine=None):
+        """
+        Arguments :
+            - groupes, bp_seuil, mp_seuil : voir __init__
+            - graine : graine des tirages, None pour le module random
+            (int, numpy.random.Generator ou None)
+        Objectif :
+        Tire de nouvelles probabilités p_cons, p_trans et p_app pour toutes les
+        entités, en gardant les connexions (et donc p_conn) du réseau.
+        """
+        groupes=["bp"]*groupes[0]+["mp"]*groupes[1]
+        aleas = None if graine is None else iter(np.random.default_rng(graine).random(3*self.taille).tolist())
+        for rang, ent in enumerate(self.liste_entites):
+            ent.tire_probabilites(groupes[rang], bp_seuil, mp_seuil, aleas)
+    
+    
+    def reinitialise_simulation(self):
+        """
+        Objectif :
+        Efface les informations de la dernière simulation, dans le réseau et dans
+        les entités, pour en lancer une nouvelle sur le même réseau.
+        """
+        self.liste_infos=[]
+        self.liste_infos_restantes=[]
+        self.liste_infos_envoyees=[]
+        self.liste_infos_consultables=set()
+        self.dict_general={}
+        self.historique = None
+        self.entites_actives = set()
+        self._pas_simulation = 0
+        self._rng_simulation = None
+        for ent in self.liste_entites:
+            ent.infos_recues = _AUCUNE_INFO
+            ent.instances_infos = _AUCUNE_INFO
+            ent.infos_actives = _AUCUNE_INFO
+            ent.historique = None
+    
+    
+    def active_entite(self, rang):
+        """
+        Argument :
+            - rang : identifiant de l'entité (int)
+        Objectif :
+        Appelée par une entité qui reçoit une information à traiter alors qu'elle
+        n'en avait plus. Si l'entité n'a pas encore tourné pendant le pas en cours,
+        elle tourne dans ce pas (comme dans le parcours de toutes les entités
+        dans l'ordre), sinon au pas suivant.
+        """
+        self.entites_actives.add(rang)
+        if self._file_pas is not None and rang > self._rang_courant:
+            heapq.heappush(self._file_pas, rang)
+    
+    
+    def remplace_voisins(self, rang, nouveaux):
+        """
+        Arguments :
+            - rang : identifiant de l'entité dont on change les voisins (int)
+            - nouveaux : identifiants des nouveaux voisins (liste ou np.array d'entiers)
+            
+        Objectif :
+        Remplace les voisins de l'entité dans l'adjacence CSR (reconstruit les
+        tableaux, O(nombre d'arêtes)) et incrémente version_voisins, ce qui vide
+        cache_distances.
+        """
+        nouveaux = np.asarray(nouveaux, dtype=np.int32)
+        ecart = len(nouveaux)-(self.voisins_debut[rang+1]-self.voisins_debut[rang])
+        self.voisins_indices = np.concatenate((self.voisins_indices[:self.voisins_debut[rang]], nouveaux, self.voisins_indices[self.voisins_debut[rang+1]:]))
+        self.voisins_debut[rang+1:] += ecart
+        self.version_voisins += 1
         
         
         
-    def calcule_diametre(self):
+    def distances_depuis(self, rang, pas_max=None):
+        """
+        Arguments :
+            - rang : identifiant de l'entité de départ (int)
+            - pas_max : distance au-delà de laquelle les entités sont comptées comme
+            pas atteignables (int ou None)
+        Objectif :
+        Renvoie les distances de l'entité à toutes les entités du réseau, -1 pour
+        celles qui ne sont pas atteignables (np.array, voir _parcours_largeur).
+        Le parcours complet est gardé dans cache_distances : sans pas_max, le
+        tableau renvoyé est celui du cache (en lecture seule).
+        """
+        distances = self.cache_distances.distances_depuis(rang)
+        if pas_max is None:
+            return distances
+        return np.where(distances <= pas_max, distances, -1).astype(np.int32)
+    
+    
+    def distance(self, rang1, rang2):
+        """
+        Arguments :
+            - rang1, rang2 : identifiants des entités (int)
+        Objectif :
+        Renvoie la distance de la première entité à la seconde, -1 si elle n'est
+        pas atteignable (int, voir cache_distances)
+        """
+        return self.cache_distances.distance(rang1, rang2)
+    
+    
+    def calcule_diametre(self, mode="exact", processus=None, nb_balayages=4, graine=None):
         """
+        Arguments :
+            - mode : "exact" ou "approche" (str)
+            - processus : nombre de processus du mode exact. Par défaut, un seul
+            processus en dessous de 1000 entités, sinon un par coeur (int ou None)
+            - nb_balayages : nombre de doubles balayages du mode approché (int)
+            - graine : graine du choix des entités de départ du mode approché
+        
         Objectifs :
         Calcule la distance maximale entre deux entites dans le réseau et la stocje
-        dans l'attribut diametre.
-        """
-        liste_distances=[]
-        entite_left=list(self.liste_entites.keys())
-        for entite1 in self.liste_entites:
-            entite_left.remove(entite1)
-            for entite2 in entite_left:
-                liste_distances.append(self.liste_entites[entite1].distance(self.liste_entites[entite2], self.taille))
-        self.diametre = max(liste_distances)    
+        dans l'attribut diametre. Les connexions étant orientées, on considère tous
+        les couples (entite1, entite2) ; les couples sans chemin sont ignorés.
+         - mode exact : un parcours en largeur par entité, les entités de départ
+         étant réparties entre plusieurs processus.
+         - mode approché (grands réseaux) : doubles balayages (parcours depuis une
+         entité, puis depuis l'entité la plus éloignée trouvée) qui donnent une
+         borne inférieure, et une borne supérieure ecc_entrante + ecc_sortante de
+         l'entité de plus haut degré quand le réseau est fortement connexe.
+         diametre reçoit la borne inférieure, diametre_bornes les deux bornes.
+        """
+        if mode == "approche":
+            self.diametre_bornes = self._bornes_diametre(nb_balayages, graine)
+            self.diametre = self.diametre_bornes[0]
+            return
+        
+        if processus is None:
+            processus = 1 if self.taille < 1000 else os.cpu_count()
+        sources = list(range(self.taille))
+        if processus <= 1:
+            _init_processus_diametre(self.voisins_debut, self.voisins_indices)
+            self.diametre = _excentricite_max(sources)
+        else:
+            paquets = [sources[i::processus*4] for i in range(processus*4)]
+            with ProcessPoolExecutor(processus, initializer=_init_processus_diametre, initargs=(self.voisins_debut, self.voisins_indices)) as pool:
+                self.diametre = max(pool.map(_excentricite_max, paquets))
+        self.diametre_bornes = (self.diametre, self.diametre)
+    
+    
+    def _bornes_diametre(self, nb_balayages, graine):
+        """
+        Objectif :
+        Renvoie les bornes (inf, sup) du diamètre du mode approché de calcule_diametre
+        """
+        rng = np.random.default_rng(graine)
+        debut, indices = self.voisins_debut, self.voisins_indices
+        inf = 0
+        for _ in range(nb_balayages):
+            depart = int(rng.integers(self.taille))
+            for _ in range(2):
+                distances = _parcours_largeur(debut, indices, depart)
+                distances[depart] = 0
+                inf = max(inf, int(distances.max()))
+                depart = int(distances.argmax())
+        
+        #adjacence inversée pour les distances entrantes
+        sources = np.repeat(np.arange(self.taille), np.diff(debut))
+        ordre = np.argsort(indices, kind="stable")
+        debut_inv = np.zeros(self.taille+1, dtype=np.int64)
+        debut_inv[1:] = np.cumsum(np.bincount(indices, minlength=self.taille))
+        centre = int(np.argmax(np.diff(debut)+np.diff(debut_inv)))
+        sortantes = _parcours_largeur(debut, indices, centre)
+        entrantes = _parcours_largeur(debut_inv, sources[ordre], centre)
+        sortantes[centre] = entrantes[centre] = 0
+        if (sortantes < 0).any() or (entrantes < 0).any():
+            return (inf, None)
+        return (inf, int(sortantes.max()+entrantes.max()))
                     
     
     def dico_general(self,pas):
@@ -389,273 +2174,1334 @@ class reseau(object):
             Pas, ie le pas de temps de la simulation au moment où on veut remplir le dico
         Objectif :
             Remplit un dictionnaire répertoriant les informations consultables ou consultées et à renvoyer présentes sur chaque entité au pas de temps "pas" 
-            Dans info_consult (attribut de entité) les informations ont la valeur :
+            Dans infos_recues (attribut de entité) les informations ont la valeur :
                 int >0 si il reste du temps pour qu'elles soient consultées
                 0 si elles ne sont plus consultables
-                "consult" si elles ont été consultées mais pas encore renvoyées
-                "transfer" si elles ont été envoyées
+                ETAT_CONSULTEE si elles ont été consultées mais pas encore renvoyées
+                ETAT_TRANSFEREE si elles ont été envoyées
         """
         #initialiser le dictionnaire au pas considéré
         self.dict_general[pas]={}
         #On répertorie toutes les informations présentes au pas de temps considéré dans infos_reçue pour chaque entité
         for entite in self.liste_entites :
-            truc=self.liste_entites[entite].infos_recues
+            truc=entite.infos_recues
             dico={}
             for info in truc:
-                #essayer de tester sa valeur si l'info est un entier
-                try :
-                    if truc[info]>0:
-                        dico[info]=1
-                #sinon, tester sa valeur si c'est un str
-                except :
-                    if truc[info]=="consult":
-                        dico[info]=1
-            self.dict_general[pas][entite]=dico
+                if truc[info]>0 or truc[info]==ETAT_CONSULTEE:
+                    dico[info]=1
+            self.dict_general[pas][entite.id]=dico
         
           
     
-    def graphe(self):
+    def graphe(self, max_aretes=None, max_entites=None, fichier=None, graine=None):
         """
+        Arguments :
+            - max_aretes : nombre maximal de connexions tracées, tirées au hasard
+            parmi celles du réseau (int ou None pour toutes)
+            - max_entites : nombre maximal d'entités tracées, on garde celles qui
+            ont le plus de connexions (entrantes et sortantes) (int ou None pour toutes)
+            - fichier : si renseigné, la figure est écrite dans ce fichier sans
+            passer par une fenêtre (str ou None)
+            - graine : graine du tirage des coordonnées et des connexions tracées
+            (int, numpy.random.Generator ou None)
         Objectif :
         Crée un graphe du réseau en 3D avec les entités et leurs connexions
         On relie une entite à ses voisins et on affecte aléatoirement des coordonnées 
-        à chaque entité 
-        
+        à chaque entité. Toutes les connexions sont tracées en une seule collection
+        de segments et toutes les entités en un seul nuage de points.
         """
-        fig = plt.figure('Connexions entre entités du réseau')
+        from mpl_toolkits.mplot3d import Axes3D
+        from mpl_toolkits.mplot3d.art3d import Line3DCollection
+        
+        rng = np.random.default_rng(graine)
+        coord = rng.random((self.taille, 3))
+        
+        #connexions (entité, voisin) tirées de l'adjacence CSR
+        sources = np.repeat(np.arange(self.taille, dtype=np.int32), np.diff(self.voisins_debut))
+        cibles = self.voisins_indices
+        
+        gardees = np.arange(self.taille)
+        if max_entites is not None and max_entites < self.taille:
+            #On garde les entités les plus connectées et les connexions entre elles
+            degres = np.diff(self.voisins_debut) + np.bincount(cibles, minlength=self.taille)
+            gardees = np.sort(np.argsort(-degres, kind="stable")[:max_entites])
+            masque = np.zeros(self.taille, dtype=bool)
+            masque[gardees] = True
+            dans_sous_graphe = masque[sources] & masque[cibles]
+            sources, cibles = sources[dans_sous_graphe], cibles[dans_sous_graphe]
+        if max_aretes is not None and max_aretes < len(sources):
+            tirees = np.sort(rng.choice(len(sources), max_aretes, replace=False))
+            sources, cibles = sources[tirees], cibles[tirees]
+        
+        if fichier is None:
+            import matplotlib.pyplot as plt
+            fig = plt.figure('Connexions entre entités du réseau')
+        else:
+            from matplotlib.figure import Figure
+            fig = Figure(figsize=(8, 8))
         ax = fig.add_subplot(111,projection='3d')
         
-        liste_x = []
-        liste_y = []
-        liste_z = []
-        for k in self.liste_entites:
-            liste_x.append(random()) ; liste_y.append(random()); liste_z.append(random())
-        
-        #print(liste_x)
-        for ent in self.liste_entites.values():
-            x=[] ; y=[] ; z=[]
-            x.append(liste_x[int(ent.id)])
-            y.append(liste_y[int(ent.id)])
-            z.append(liste_z[int(ent.id)])
-            for vois in ent.voisins :
-                rang=int(vois.id)
-                x.append(liste_x[rang])
-                y.append(liste_y[rang])
-                z.append(liste_z[rang])
-            ax.plot(x,y,z,color='r', marker="o")
-            #print(x)
-       
+        segments = np.stack((coord[sources], coord[cibles]), axis=1)
+        ax.add_collection3d(Line3DCollection(segments, colors='r', linewidths=0.5))
+        ax.scatter(coord[gardees, 0], coord[gardees, 1], coord[gardees, 2], color='r', marker="o", s=8, depthshade=False)
+        ax.set_xlim(0, 1); ax.set_ylim(0, 1); ax.set_zlim(0, 1)
+        if fichier is not None:
+            fig.savefig(fichier)
             
             
             
-    def simulation(self, pas_max_simul, nbre_infos, pas_max_info):
+    def simulation(self, pas_max_simul, nbre_infos, pas_max_info, historique=None, instrumentation=None, graine=None,
+                   sauvegarde=None, periode_sauvegarde=1000, reprise=False, arrivees=None):
         """
         Arguments :
             - pas_max_simul : nombre de pas à partir duquel la simulation est arrêtée (entier)
             - nbre_infos : nombre d'informations que le réseau va contenir
             - pas_max_info : temps (en pas de temps) à partir duquel une information
             n'est plus consultable par une entité
+            - historique : enregistreur d'historique (HistoriqueVide, HistoriqueTransitions
+            ou HistoriqueFichier). Par défaut (None), dict_general est rempli à chaque pas.
+            - instrumentation : mesures des temps par phase et des compteurs par pas
+            (Instrumentation ou None)
+            - graine : graine des tirages (int, numpy.random.Generator, par exemple
+            self.rng, ou None pour le module random). Avec une graine, les nombres
+            aléatoires d'un pas sont tirés par blocs (voir _flux_aleas), le premier
+            dimensionné d'après le nombre d'informations à traiter ; ce qui reste
+            du dernier bloc à la fin du pas est abandonné.
+            - sauvegarde : fichier où écrire un point de reprise (voir sauvegarde())
+            tous les periode_sauvegarde pas (str ou None)
+            - periode_sauvegarde : nombre de pas entre deux points de reprise (int)
+            - reprise : continue la simulation interrompue dont le réseau a été
+            rechargé par depuis_sauvegarde() au lieu d'en commencer une nouvelle
+            (nbre_infos et graine sont alors ignorés). Le résultat est le même que
+            celui de la simulation sans interruption, mais dict_general (ou
+            l'historique) ne contient que les pas faits depuis la reprise (bool)
+            - arrivees : processus d'arrivée des informations, qui donne le nombre
+            d'informations à envoyer à chaque pas (arrivees_par_pas, arrivees_poisson,
+            arrivees_calendrier avec functools.partial, ou None pour une par pas).
+            Il n'est pas sauvegardé dans les points de reprise : le redonner à la reprise.
         
         Objectifs : 
          - Créé les instances d'information qui font parties de la simulation
-         - Envoie une information choisie aléatoirement parmis celles qui restent
-         à une entité choisie aléatoirement 
-         - Fait tourner la méthode manipule_info() de chaque entité
+         - Envoie des informations choisies aléatoirement parmis celles qui restent
+         (retirées en temps constant), chacune à une entité choisie aléatoirement 
+         - Fait tourner la méthode manipule_info() de chaque entité qui a au moins
+         une information à traiter (entites_actives), dans l'ordre des identifiants
          - Calcule pour chaque information plus consultable le temps qu'elle a passé dans le réseau 
         """
         
+        for _ in self._deroule_simulation(pas_max_simul, nbre_infos, pas_max_info, historique, instrumentation, graine,
+                                          sauvegarde, periode_sauvegarde, reprise, arrivees):
+            pass
+    
+    
+    def simulation_flux(self, pas_max_simul, nbre_infos, pas_max_info, graine=None, instrumentation=None, reprise=False,
+                        arrivees=None):
+        """
+        Arguments :
+            - pas_max_simul, nbre_infos, pas_max_info, graine, instrumentation, reprise,
+            arrivees : voir simulation()
+        Objectif :
+        Générateur qui fait tourner la même simulation que simulation() et renvoie,
+        à la fin de chaque pas, les événements du pas (EvenementsPas : injections,
+        réceptions, consultations, appréciations, transferts, expirations et
+        informations mortes). Ni dict_general ni l'historique ne sont remplis : seuls
+        les événements du pas en cours sont gardés en mémoire. On peut agréger les
+        événements au fur et à mesure ou arrêter la simulation en cours de route
+        (break ou close()), chaque pas étant rendu avant que le suivant ne soit calculé.
+        """
+        historique = HistoriqueFlux()
+        with contextlib.closing(self._deroule_simulation(pas_max_simul, nbre_infos, pas_max_info, historique, instrumentation,
+                                                         graine, None, 1, reprise, arrivees)) as deroulement:
+            for pas, injections, mortes in deroulement:
+                yield historique.evenements(pas, injections, mortes)
+    
+    
+    def _deroule_simulation(self, pas_max_simul, nbre_infos, pas_max_info, historique, instrumentation, graine,
+                            sauvegarde, periode_sauvegarde, reprise, arrivees):
+        """
+        Objectif :
+        Générateur qui fait tourner simulation() (mêmes arguments) et renvoie après
+        chaque pas le triplet (pas, injections, mortes) : les couples (entité, info)
+        injectés et les identifiants des informations mortes pendant le pas.
+        Si on l'arrête avant la fin, le réseau reste dans l'état du dernier pas
+        renvoyé (temps_reseau n'est pas calculé pour les informations encore vivantes).
+        """
+        
         self.dict_general={}
-        info_pas_debut = {}
+        self.historique = historique
+        self.entites_actives = set(rang for rang, ent in enumerate(self.liste_entites) if ent.infos_actives)
         
-        #On créé la liste des instances d'information
-        for i in range(nbre_infos):
-            nv_info = information(i)
-            self.liste_infos.append(nv_info)
-            self.liste_infos_restantes.append(nv_info)
-            self.liste_infos_consultables.append(nv_info)
-            info_pas_debut[nv_info.id]= ''
+        if reprise:
+            #On repart du pas et des tirages enregistrés dans le point de reprise
+            k = self._pas_simulation
+            rng = self._rng_simulation
+            infos_simulation = list(self.liste_infos)
+            infos_vivantes = set(i for i in self.liste_infos_envoyees if i in self.liste_infos_consultables)
+        else:
+            k = 0
+            rng = None if graine is None else np.random.default_rng(graine)
+            #infos envoyées et encore consultables, les seules dont on teste la "mort" à chaque pas
+            infos_vivantes = set()
+            
+            infos_simulation = []
+            
+            #On créé la liste des instances d'information
+            for i in range(nbre_infos):
+                nv_info = information(i)
+                infos_simulation.append(nv_info)
+                self.liste_infos.append(nv_info)
+                self.liste_infos_restantes.append(nv_info)
+                self.liste_infos_consultables.add(nv_info)
+        self._rng_simulation = rng
         
         #On attribue à l'attribut pas_max de chaque ientité temps maximal
         #pour lequel une info est consultable
-        for j in self.liste_entites.values():
+        for j in self.liste_entites:
             j.pas_max = pas_max_info
+            j.historique = historique
 
         
         #La simulation à proprement parlé
 
-        k=0
-        #Temps qu'au moins une information est encore consultable ou que le temps de la simulation n'excède pas le temps maximal entré, on fait tourner la simulation
-        while self.liste_infos_consultables != [] and k<pas_max_simul:
+        try:
+            #Temps qu'au moins une information est encore consultable ou que le temps de la simulation n'excède pas le temps maximal entré, on fait tourner la simulation
+            while self.liste_infos_consultables and k<pas_max_simul:
+                if historique is not None:
+                    historique.pas = k
+                if instrumentation is not None:
+                    instrumentation.debut_pas()
+                if rng is not None:
+                    #au plus 2 tirages pour l'injection et 3 par information active
+                    self.tire = _flux_aleas(rng, 2+3*sum(len(self.liste_entites[rang].infos_actives) for rang in self.entites_actives)).__next__
 
-            #A chaque pas, on envoie une information choisie aléatoirement parmi celles qui
-            #restent à une entité choisie aléatoirement
-            if self.liste_infos_restantes != []:
-                rang_entite_alea = randint(0,len(self.liste_entites)-1)
-                rang_info_alea = randint(0,len(self.liste_infos_restantes)-1)
+                #A chaque pas, on envoie des informations choisies aléatoirement parmi celles qui
+                #restent (une par défaut, voir arrivees) chacune à une entité choisie aléatoirement
+                injections = []
+                nb_arrivees = 1 if arrivees is None else arrivees(k, self.tire)
+                for _ in range(min(nb_arrivees, len(self.liste_infos_restantes))):
+                    if rng is None:
+                        rang_entite_alea = randint(0,len(self.liste_entites)-1)
+                        rang_info_alea = randint(0,len(self.liste_infos_restantes)-1)
+                    else:
+                        rang_entite_alea = int(self.tire()*len(self.liste_entites))
+                        rang_info_alea = int(self.tire()*len(self.liste_infos_restantes))
+                    info = _retire_rang(self.liste_infos_restantes, rang_info_alea)
                 
-                info_pas_debut[self.liste_infos_restantes[rang_info_alea].id] = k
+                    info.pas_debut = k
+                    infos_vivantes.add(info)
                 
-                self.liste_entites[str(rang_entite_alea)].recoie_info(self.liste_infos_restantes[rang_info_alea])
-                self.liste_entites[str(rang_entite_alea)].envoie_info(self.liste_infos_restantes[rang_info_alea])
+                    self.liste_entites[rang_entite_alea].recoie_info(info)
+                    self.liste_entites[rang_entite_alea].envoie_info(info)
     
-                self.liste_infos_envoyees.append(self.liste_infos_restantes[rang_info_alea])
-                self.liste_infos_restantes.pop(rang_info_alea)
+                    self.liste_infos_envoyees.append(info)
+                    injections.append((rang_entite_alea, info.id))
+                if instrumentation is not None:
+                    instrumentation.top("injection")
             
             
-            #Pour chaque entité, on fait tourner la méthode manipule_info()
-            for p in self.liste_entites.values():
-                p.manipule_info()
+                #Pour chaque entité active, on fait tourner la méthode manipule_info(). Les
+                #entités inactives n'ont rien à traiter (et aucun tirage aléatoire à faire)
+                self._file_pas = sorted(self.entites_actives)
+                while self._file_pas:
+                    rang = heapq.heappop(self._file_pas)
+                    if rang <= self._rang_courant:
+                        continue
+                    self._rang_courant = rang
+                    p = self.liste_entites[rang]
+                    p.manipule_info()
+                    if not p.infos_actives:
+                        self.entites_actives.discard(rang)
+                self._file_pas = None
+                self._rang_courant = -1
+                if instrumentation is not None:
+                    instrumentation.top("manipulation")
             
             
             
-            #Pour chaque info envoyée, on stocke son temps passé dans le réseau si elle n'est plus consultable par personne
-            for i in self.liste_infos_envoyees :
-                
-                #Pour les informations qui n'ont pas encore été noté comme plus consultables, on teste si elles le sont ou non
-                if i in self.liste_infos_consultables:
-                #On récupère le pas auquel l'info i a été envoyée dans le reseau
-                    for m in info_pas_debut.keys():
-                        if m == i.id: 
-                            debut = info_pas_debut[m]
-                    
-                    etat_info = []
-                    for j in self.liste_entites.values() : 
-                        if i.id in j.infos_recues.keys(): #Pour les entités qui ont reçu l'info i
-                            #On stocke "l'état" de l'info dans cette entité (consultable,consultée ou transférée)
-                            etat_info.append(j.infos_recues[i.id])
-                            
-                    #Si toutes les entités ont reçues cette information
-                    if len(etat_info) == len(self.liste_entites):
-                        compteur_consult = 0
-                        for p in etat_info:
-                            if p == "consult" or p == "transfere":
-                                compteur_consult += 1
-                    #Et si toutes ces entités l'ont consultée et/ou transférée, l'info n'est plus consultable par personne (elle est "morte")
-                        if compteur_consult == len(etat_info):
-                            i.temps_reseau = k-debut
-                            self.liste_infos_consultables.remove(i)
-                     
+                #Pour chaque info envoyée encore consultable, on relève le nombre d'entités pour
+                #lesquelles elle est visible et on stocke son temps passé dans le réseau si elle
+                #n'est plus consultable par personne (elle est "morte"), d'après ses compteurs
+                for i in infos_vivantes:
+                    i.pic_visibles = max(i.pic_visibles, i.nb_recues-i.nb_zero-i.nb_transferts)
+                mortes = [i for i in infos_vivantes if i.est_morte(len(self.liste_entites))]
+                for i in mortes:
+                    i.temps_reseau = k-i.pas_debut
+                    infos_vivantes.discard(i)
+                    self.liste_infos_consultables.discard(i)
+                if instrumentation is not None:
+                    instrumentation.top("mort")
                         
-                    compteur_zero = 0
-                    for p in etat_info:
-                        if p == 0:
-                            compteur_zero += 1
-                        #Si, pour toutes les entités qui ont reçues l'info, elle n'est plus consutable, elle est "morte"
-                    if compteur_zero == len(etat_info):
-                        i.temps_reseau = k-debut
-                        self.liste_infos_consultables.remove(i)
-                        
-            self.dico_general(k)
-            k +=1
+                if historique is None:
+                    self.dico_general(k)
+                else:
+                    historique.nb_pas = k+1
+                if instrumentation is not None:
+                    instrumentation.top("historique")
+                    instrumentation.fin_pas(k, infos_simulation, len(mortes))
+                k +=1
+                self._pas_simulation = k
+                if sauvegarde is not None and k % periode_sauvegarde == 0:
+                    self.sauvegarde(sauvegarde)
+                yield k-1, injections, [i.id for i in mortes]
             
-        #Pour les infos encore consultables à la fin de la simulation, on stocke leur temps dans le réseau
-        for i in self.liste_infos_consultables:
-            for m in info_pas_debut.keys():
-                if m == i.id: 
-                    debut = info_pas_debut[m]
-            i.temps_reseau = pas_max_simul-debut
+            #Pour les infos encore consultables à la fin de la simulation, on stocke leur temps dans le réseau
+            for i in infos_vivantes:
+                i.temps_reseau = pas_max_simul-i.pas_debut
+        finally:
+            self.tire = random
+            self._file_pas = None
+            self._rang_courant = -1
+        
+
+    def sauvegarde(self, chemin):
+        """
+        Argument :
+            - chemin : fichier du point de reprise (str)
+        Objectif :
+        Ecrit dans un fichier binaire (npz non compressé, écrit à côté puis
+        renommé pour qu'une interruption ne laisse pas de fichier incomplet) tout
+        ce qu'il faut pour reprendre la simulation au pas suivant : l'adjacence
+        CSR, les probabilités des entités, les codes de infos_recues et l'ordre
+        de infos_actives, les compteurs et consultations des informations, les
+        listes d'informations restantes, envoyées et consultables, leur pas_debut
+        et l'état du générateur aléatoire (numpy ou module random).
+        dict_general et l'historique ne sont pas sauvegardés.
+        """
+        position = {id(info): rang for rang, info in enumerate(self.liste_infos)}
+        probabilites = np.array([(ent.p_conn, ent.p_cons, ent.p_trans, ent.p_app) for ent in self.liste_entites]).reshape(-1, 4)
+        recues, actives, consultations = [], [], []
+        for rang, ent in enumerate(self.liste_entites):
+            recues.extend((rang, position[id(ent.instances_infos[i])], etat) for i, etat in ent.infos_recues.items())
+            actives.extend((rang, position[id(ent.instances_infos[i])]) for i in ent.infos_actives)
+        compteurs = np.array([(info.id, info.temps_reseau, -1 if info.pas_debut is None else info.pas_debut, info.nb_recues,
+                               info.nb_zero, info.nb_consult, info.nb_appr, info.nb_transferts, info.pic_visibles)
+                              for info in self.liste_infos], dtype=np.int64).reshape(-1, 9)
+        for rang, info in enumerate(self.liste_infos):
+            consultations.extend(zip(info.consultations, itertools.repeat(rang), info.appreciations))
+        if self._rng_simulation is None:
+            aleas = {"type": "random", "etat": getstate()}
+        else:
+            aleas = {"type": "numpy", "etat": self._rng_simulation.bit_generator.state}
+        
+        temporaire = chemin+".tmp"
+        with open(temporaire, "wb") as fichier:
+            np.savez(fichier, pas=self._pas_simulation, voisins_debut=self.voisins_debut, voisins_indices=self.voisins_indices,
+                     probabilites=probabilites, pas_max=np.array([ent.pas_max for ent in self.liste_entites], dtype=np.int64),
+                     recues=np.array(recues, dtype=np.int64).reshape(-1, 3), actives=np.array(actives, dtype=np.int64).reshape(-1, 2),
+                     compteurs=compteurs, consultations=np.array(consultations, dtype=np.int64).reshape(-1, 3),
+                     restantes=np.array([position[id(i)] for i in self.liste_infos_restantes], dtype=np.int64),
+                     envoyees=np.array([position[id(i)] for i in self.liste_infos_envoyees], dtype=np.int64),
+                     consultables=np.array(sorted(position[id(i)] for i in self.liste_infos_consultables), dtype=np.int64),
+                     aleas=np.array(json.dumps(aleas)))
+        os.replace(temporaire, chemin)
+    
+    
+    @classmethod
+    def depuis_sauvegarde(cls, chemin):
+        """
+        Argument :
+            - chemin : fichier écrit par sauvegarde() (str)
+        Objectif :
+        Renvoie un réseau dans l'état du point de reprise, sur lequel
+        simulation(..., reprise=True) continue la simulation interrompue.
+        Si elle utilisait le module random, son état est restauré.
+        """
+        with np.load(chemin) as donnees:
+            donnees = {nom: donnees[nom] for nom in donnees.files}
+        probabilites = donnees["probabilites"]
+        n = len(probabilites)
+        
+        #On recrée le réseau sans tirer de connexions ni de probabilités
+        R = cls(0, [0, 0], 0., 0.)
+        R.taille = n
+        R.voisins_debut = donnees["voisins_debut"]
+        R.voisins_indices = donnees["voisins_indices"]
+        for rang in range(n):
+            #groupe "bp" de seuil 0 : p_app est recopiée telle quelle
+            ent = Entite(rang, "bp", 0., 0., iter(probabilites[rang].tolist()))
+            ent.reseau = R
+            ent._voisins = None
+            ent.pas_max = int(donnees["pas_max"][rang])
+            R.liste_entites.append(ent)
+        
+        for ID, temps, pas_debut, nb_recues, nb_zero, nb_consult, nb_appr, nb_transferts, pic in donnees["compteurs"].tolist():
+            info = information(ID)
+            info.temps_reseau, info.pas_debut = temps, None if pas_debut < 0 else pas_debut
+            info.nb_recues, info.nb_zero, info.nb_consult, info.nb_appr = nb_recues, nb_zero, nb_consult, nb_appr
+            info.nb_transferts, info.pic_visibles = nb_transferts, pic
+            R.liste_infos.append(info)
+        for rang, position, appr in donnees["consultations"].tolist():
+            R.liste_infos[position].consultations.append(rang)
+            R.liste_infos[position].appreciations.append(appr)
+        for rang, position, etat in donnees["recues"].tolist():
+            ent, info = R.liste_entites[rang], R.liste_infos[position]
+            ent.alloue_infos()
+            ent.infos_recues[info.id] = etat
+            ent.instances_infos[info.id] = info
+        for rang, position in donnees["actives"].tolist():
+            R.liste_entites[rang].infos_actives[R.liste_infos[position].id] = None
+        R.liste_infos_restantes = [R.liste_infos[position] for position in donnees["restantes"].tolist()]
+        R.liste_infos_envoyees = [R.liste_infos[position] for position in donnees["envoyees"].tolist()]
+        R.liste_infos_consultables = set(R.liste_infos[position] for position in donnees["consultables"].tolist())
+        
+        R._pas_simulation = int(donnees["pas"])
+        aleas = json.loads(str(donnees["aleas"]))
+        if aleas["type"] == "random":
+            version, etat, gauss = aleas["etat"]
+            setstate((version, tuple(etat), gauss))
+        else:
+            R._rng_simulation = np.random.Generator(getattr(np.random, aleas["etat"]["bit_generator"])())
+            R._rng_simulation.bit_generator.state = aleas["etat"]
+        return R
+    
+    
+    def simulation_vectorisee(self, pas_max_simul, nbre_infos, pas_max_info, graine=None, historique=None, arrivees=None):
+        """
+        Arguments :
+            - pas_max_simul, nbre_infos, pas_max_info, historique, arrivees : voir simulation()
+            - graine : graine du générateur aléatoire (int, numpy.random.Generator ou None)
+        
+        Objectifs :
+         - Fait tourner la même simulation que simulation(), mais l'état du réseau
+         est stocké dans une matrice entités x informations (voir les codes ETAT_*)
+         et chaque pas se résume à quelques tirages aléatoires groupés.
+         - Les entités sont parcourues dans le même ordre que dans simulation() :
+         une information transférée par une entité à une entité d'identifiant plus
+         grand est manipulée par celle-ci dans le même pas, sinon au pas suivant.
+         On traite donc chaque pas en plusieurs vagues.
+         - Remplit comme simulation() les infos_recues des entités, les
+         consultations et temps_reseau des informations et dict_general
+         (ou l'historique).
+        """
+        rng = np.random.default_rng(graine)
+        entites = self.liste_entites
+        n = len(entites)
+        debut, indices = self.voisins_debut, self.voisins_indices
+        degre = np.diff(debut)
+        p_cons = np.array([ent.p_cons for ent in entites])
+        p_app = np.array([ent.p_app for ent in entites])
+        p_trans = np.array([ent.p_trans for ent in entites])
+        
+        etat = np.full((n, nbre_infos), ETAT_NON_RECUE, dtype=np.int32)
+        #cellules reçues pendant le pas d'une entité déjà manipulée, à traiter au pas suivant
+        differe = np.zeros((n, nbre_infos), dtype=bool)
+        suivi = _SuiviInfos(nbre_infos, pas_max_info, None if historique is None else historique.enregistre_tableaux)
+        consultations = []
+        appreciations = []
+        
+        def vague(lignes, colonnes):
+            (l, c), (l_cons, c_cons, apprecie), (l_trans, c_trans) = _manipule_cellules(
+                etat, lignes, colonnes, p_cons, p_app, p_trans, degre, rng)
+            suivi.nb_zero += np.bincount(c, minlength=nbre_infos)
+            suivi.nb_consult += np.bincount(c_cons, minlength=nbre_infos)
+            suivi.nb_transferts += np.bincount(c_trans, minlength=nbre_infos)
+            consultations.append((l_cons, c_cons))
+            appreciations.append((l_cons[apprecie], c_cons[apprecie]))
+            if historique is not None:
+                historique.enregistre_tableaux(l, c, 0)
+                historique.enregistre_tableaux(l_cons, c_cons, ETAT_CONSULTEE)
+                historique.enregistre_tableaux(l_trans, c_trans, ETAT_TRANSFEREE)
+            
+            rang, recepteurs = _developpe_voisins(debut, indices, l_trans)
+            (l, c), immediates = _recoit_cellules(etat, differe, recepteurs, c_trans[rang], l_trans[rang], pas_max_info)
+            suivi.compte_receptions(l, c)
+            return immediates
+        
+        self.dict_general = {}
+        self.historique = historique
+        k = 0
+        while suivi.consultables.any() and k < pas_max_simul:
+            if historique is not None:
+                historique.pas = k
+            suivi.injecte(k, etat, debut, indices, rng, arrivees)
+            
+            #Les vagues successives du pas
+            lignes, colonnes = np.nonzero((etat > 0) | (etat == ETAT_CONSULTEE))
+            while len(lignes) > 0:
+                lignes, colonnes = vague(lignes, colonnes)
+            differe[:] = False
+            suivi.fin_pas(k, n)
+            
+            if historique is None:
+                self._dico_general_matrice(k, etat)
+            else:
+                historique.nb_pas = k+1
+            k += 1
+        suivi.termine(pas_max_simul)
+        
+        self._ecrit_etat_matrice(etat, suivi, consultations, appreciations)
+    
+    
+    def simulation_parallele(self, pas_max_simul, nbre_infos, pas_max_info, processus=None, graine=None, historique=None,
+                             arrivees=None, etat_entites=True):
+        """
+        Arguments :
+            - pas_max_simul, nbre_infos, pas_max_info, historique, arrivees : voir simulation()
+            (passer HistoriqueVide() pour les grands réseaux, dict_general étant
+            recopié à chaque pas par le processus principal)
+            - processus : nombre de processus de calcul (int, None pour un par coeur)
+            - graine : graine des générateurs aléatoires (int ou None)
+            - etat_entites : recopie l'état final dans les entités (infos_recues, etc.).
+            Sinon, seules les informations sont remplies, ce qui suffit à bilan()
+            et resultats_infos() (bool)
+        
+        Objectifs :
+         - Fait tourner la simulation de simulation_vectorisee() en répartissant
+         les entités en tranches d'identifiants consécutifs, une par processus.
+         - La matrice d'état, les probabilités des entités, l'adjacence et les
+         compteurs par information sont dans des blocs de mémoire partagée
+         (multiprocessing.shared_memory). Chaque processus manipule les cellules
+         de sa tranche, écrit ses transferts dans son propre bloc partagé puis,
+         après une barrière, applique à sa tranche les transferts que tous les
+         processus lui destinent (voir _Tranche). Le processus principal ne fait
+         que les injections, le test de mort des informations en fin de pas et la
+         synchronisation : les messages entre processus ne portent que des noms
+         de blocs et des nombres de cellules.
+         - Les consultations (et l'historique) sont rapatriées à la fin de la simulation.
+         - Chaque processus a son propre générateur, tiré de la graine : les
+         résultats ne dépendent que de la graine et du nombre de processus, et
+         suivent la même loi que ceux des autres moteurs.
+         - La recopie de l'état final dans les entités (voir etat_entites) et, sans
+         historique, celle de dict_general à chaque pas restent faites par le
+         processus principal : ce sont les seules parties qui ne se répartissent pas.
+        """
+        entites = self.liste_entites
+        n = len(entites)
+        if processus is None:
+            processus = os.cpu_count()
+        processus = max(min(processus, n), 1)
+        if isinstance(graine, np.random.Generator):
+            graine = int(graine.integers(2**63))
+        graines = np.random.SeedSequence(graine).spawn(processus+1)
+        rng = np.random.default_rng(graines[0])
+        bornes = np.linspace(0, n, processus+1).astype(np.int64).tolist()
+        
+        #On crée les blocs partagés et on y recopie l'état initial
+        initiaux = [np.full((n, nbre_infos), ETAT_NON_RECUE, dtype=np.int32),
+                    np.array([ent.p_cons for ent in entites]), np.array([ent.p_app for ent in entites]),
+                    np.array([ent.p_trans for ent in entites]), self.voisins_debut, self.voisins_indices,
+                    np.zeros((processus, 4, nbre_infos), dtype=np.int64), np.zeros((processus, processus+1), dtype=np.int64)]
+        blocs = [shared_memory.SharedMemory(create=True, size=max(t.nbytes, 1)) for t in initiaux]
+        descriptions = [(bloc.name, t.shape, t.dtype.str) for bloc, t in zip(blocs, initiaux)]
+        tableaux = [np.ndarray(t.shape, dtype=t.dtype, buffer=bloc.buf) for bloc, t in zip(blocs, initiaux)]
+        for tableau, t in zip(tableaux, initiaux):
+            tableau[...] = t
+        del initiaux
+        garde_transitions = historique is not None and historique.garde_transitions
         
+        contexte = multiprocessing.get_context()
+        connexions, travailleurs = [], []
+        try:
+            for rang in range(processus):
+                connexion, extremite = contexte.Pipe()
+                travailleur = contexte.Process(target=_travailleur_tranche, daemon=True,
+                                               args=(descriptions, rang, bornes, pas_max_info, garde_transitions,
+                                                     graines[rang+1], extremite))
+                travailleur.start()
+                extremite.close()
+                connexions.append(connexion)
+                travailleurs.append(travailleur)
+            suivi, consultations, appreciations = self._deroule_simulation_parallele(
+                pas_max_simul, nbre_infos, pas_max_info, historique, arrivees, tableaux[0], tableaux[6], connexions, rng)
+            etat_final = tableaux[0].copy()
+        finally:
+            for connexion in connexions:
+                with contextlib.suppress(OSError):
+                    connexion.send(("fin",))
+            for travailleur in travailleurs:
+                travailleur.join()
+            del tableaux
+            for bloc in blocs:
+                #(des vues peuvent rester référencées par la trace d'une exception)
+                with contextlib.suppress(BufferError):
+                    bloc.close()
+                bloc.unlink()
+        
+        self._ecrit_etat_matrice(etat_final, suivi, consultations, appreciations, etat_entites)
+    
+    
+    def _deroule_simulation_parallele(self, pas_max_simul, nbre_infos, pas_max_info, historique, arrivees, etat, compteurs,
+                                      connexions, rng):
+        """
+        Objectif :
+        Boucle des pas de simulation_parallele(), exécutée par le processus
+        principal. Renvoie le suivi des informations (_SuiviInfos) et les
+        consultations et appréciations, comme les attend _ecrit_etat_matrice().
+        """
+        n = len(etat)
+        debut, indices = self.voisins_debut, self.voisins_indices
+        #Les transitions sont enregistrées à la fin, dans l'ordre (pas, vague, phase, processus)
+        transitions = []
+        enregistre = None
+        if historique is not None and historique.garde_transitions:
+            enregistre = lambda entites, infos, code: transitions.append(((k, -1, 0, len(connexions), 0), entites, infos, code))
+        suivi = _SuiviInfos(nbre_infos, pas_max_info, enregistre)
+        
+        def barriere(ordre):
+            for connexion in connexions:
+                connexion.send(ordre)
+            return [connexion.recv() for connexion in connexions]
+        
+        self.dict_general = {}
+        self.historique = historique
+        k = 0
+        while suivi.consultables.any() and k < pas_max_simul:
+            suivi.injecte(k, etat, debut, indices, rng, arrivees)
+            
+            #Les vagues successives du pas, la première sur toutes les cellules visibles
+            noms = barriere(("pas", k))
+            while sum(barriere(("recois", noms))) > 0:
+                noms = barriere(("vague",))
+            suivi.fin_pas(k, n, suivi.compteurs + compteurs.sum(axis=0))
+            
+            if historique is None:
+                self._dico_general_matrice(k, etat)
+            else:
+                historique.nb_pas = k+1
+            k += 1
+        suivi.termine(pas_max_simul)
+        
+        #On rapatrie les consultations et les transitions des processus
+        consultations = []
+        for consultations_processus, transitions_processus in barriere(("bilan",)):
+            consultations.extend(consultations_processus)
+            transitions.extend(transitions_processus)
+        consultations.sort(key=lambda t: t[0])
+        transitions.sort(key=lambda t: t[0])
+        if historique is not None:
+            for moment, entites, infos, code in transitions:
+                historique.pas = moment[0]
+                historique.enregistre_tableaux(entites, infos, code)
+        return (suivi, [(l, c) for _, l, c, apprecie in consultations],
+                [(l[apprecie], c[apprecie]) for _, l, c, apprecie in consultations])
+    
+    
+    def _dico_general_matrice(self, pas, etat):
+        """
+        Arguments :
+            - pas : le pas de temps de la simulation (int)
+            - etat : matrice d'état entités x informations du moteur vectorisé (np.array)
+        Objectif :
+            Remplit dict_general au pas "pas" comme dico_general() à partir de la matrice d'état
+        """
+        self.dict_general[pas] = {ent.id: {} for ent in self.liste_entites}
+        lignes, colonnes = np.nonzero((etat > 0) | (etat == ETAT_CONSULTEE))
+        for ligne, colonne in zip(lignes.tolist(), colonnes.tolist()):
+            self.dict_general[pas][ligne][colonne] = 1
+    
+    
+    def _ecrit_etat_matrice(self, etat, suivi, consultations, appreciations, etat_entites=True):
+        """
+        Arguments :
+            - etat : matrice d'état finale (np.array)
+            - suivi : suivi des informations de la simulation (_SuiviInfos)
+            - consultations, appreciations : cellules (l, c) consultées et appréciées,
+            par vague dans l'ordre de la simulation (listes de couples de np.array)
+            - etat_entites : remplit aussi les dictionnaires des entités (bool)
+        Objectif :
+        Recopie l'état final des moteurs à matrice d'état dans les instances
+        d'entités et d'informations, pour que bilan(), graphe_immeuble() etc.
+        fonctionnent comme après simulation().
+        """
+        infos = [information(i) for i in range(etat.shape[1])]
+        nb_recues = (etat != ETAT_NON_RECUE).sum(axis=0)
+        nb_zero = (etat == 0).sum(axis=0)
+        nb_transferts = (etat == ETAT_TRANSFEREE).sum(axis=0)
+        for info in infos:
+            info.temps_reseau = int(suivi.temps[info.id])
+            info.nb_recues = int(nb_recues[info.id])
+            info.nb_zero = int(nb_zero[info.id])
+            info.nb_transferts = int(nb_transferts[info.id])
+            info.pic_visibles = int(suivi.pic_visibles[info.id])
+            if suivi.envoyees[info.id]:
+                info.pas_debut = int(suivi.pas_debut[info.id])
+        #consultations de chaque information dans l'ordre, et celles qui ont été appréciées
+        l = np.concatenate([l for l, c in consultations] + [np.zeros(0, dtype=np.int64)])
+        c = np.concatenate([c for l, c in consultations] + [np.zeros(0, dtype=np.int64)])
+        cles_appr = np.concatenate([c_a.astype(np.int64)*len(etat) + l_a for l_a, c_a in appreciations] + [np.zeros(0, dtype=np.int64)])
+        appr = np.isin(c.astype(np.int64)*len(etat) + l, cles_appr).astype(np.uint8)
+        ordre = np.argsort(c, kind="stable")
+        fins = np.searchsorted(c[ordre], np.arange(len(infos)), side="right")
+        debut = 0
+        for info in infos:
+            info.consultations = array("i", l[ordre[debut:fins[info.id]]].astype(np.int32).tobytes())
+            info.appreciations = bytearray(appr[ordre[debut:fins[info.id]]].tobytes())
+            info.nb_consult = len(info.consultations)
+            info.nb_appr = int(appr[ordre[debut:fins[info.id]]].sum())
+            debut = fins[info.id]
+        
+        self.liste_infos.extend(infos)
+        self.liste_infos_restantes = [infos[i] for i in suivi.restantes]
+        self.liste_infos_envoyees.extend(info for info in infos if suivi.envoyees[info.id])
+        self.liste_infos_consultables = set(info for info in infos if suivi.consultables[info.id])
+        
+        if not etat_entites:
+            return
+        #On remplit les dictionnaires des entités ligne par ligne (les cellules
+        #d'une ligne sont rangées par information croissante)
+        lignes, colonnes = np.nonzero(etat != ETAT_NON_RECUE)
+        codes = etat[lignes, colonnes]
+        visibles = ((codes > 0) | (codes == ETAT_CONSULTEE)).tolist()
+        coupures = np.flatnonzero(np.diff(lignes)) + 1
+        premieres = np.concatenate(([0], coupures)).tolist()
+        dernieres = np.concatenate((coupures, [len(lignes)])).tolist()
+        rangs = lignes[premieres].tolist() if len(lignes) else []
+        colonnes, codes = colonnes.tolist(), codes.tolist()
+        for rang, premiere, derniere in zip(rangs, premieres, dernieres):
+            ent = self.liste_entites[rang]
+            ent.alloue_infos()
+            cellules = colonnes[premiere:derniere]
+            ent.infos_recues.update(zip(cellules, codes[premiere:derniere]))
+            ent.instances_infos.update(zip(cellules, map(infos.__getitem__, cellules)))
+            ent.infos_actives.update(dict.fromkeys(itertools.compress(cellules, visibles[premiere:derniere])))
+        self.entites_actives = set(rang for rang, ent in enumerate(self.liste_entites) if ent.infos_actives)
+
 
-    def graphe_immeuble(self):
+    def vues_historique(self):
+        """
+        Objectif :
+        Générateur des couples (pas, dict_general[pas]) de la dernière simulation,
+        reconstruits depuis l'historique si la simulation en avait un.
+        """
+        if self.historique is None:
+            return iter(self.dict_general.items())
+        return self.historique.vues(len(self.liste_entites))
+    
+    
+    def graphe_immeuble(self, mode="barres", fichier=None, carte_couleurs="turbo"):
         """
         Arguments :
-            Pas d'argument, mais utilise self.dict_general donc il faut l'avoir rempli a priori dans une simulation
+            - mode : "barres" pour le barplot groupé, "carte" pour une carte de
+            chaleur pas x entités du nombre d'informations visibles (str)
+            - fichier : si renseigné, la figure est écrite dans ce fichier (PNG, SVG...
+            selon l'extension) sans passer par une fenêtre (str ou None)
+            - carte_couleurs : nom de la carte de couleurs matplotlib (str)
+            Utilise self.dict_general (ou l'historique) donc il faut l'avoir rempli a priori dans une simulation
         Objectif :
-            Crée un barplot groupé représentant pour chaque entité à un temps t les informations disponibles consultables ou consultées par cette entité
+            Crée un barplot groupé représentant pour chaque entité à un temps t les informations disponibles consultables ou consultées par cette entité.
+            Toutes les barres sont tracées en une seule collection de rectangles, et
+            les couleurs des informations sont tirées d'une carte de couleurs, ce qui
+            permet d'avoir autant d'informations qu'on veut.
         """
+        import matplotlib
         
-        #définir les ticks. Pour être sûr d'avoir la place, on met autant d'espace entre chaque pas qu'il y a d'entités
-        X=list(self.dict_general.keys())
-        X=[int(i)*len(self.liste_entites) for i in X]
-        #On définit barWidth en fonction du nombre d'entités
-        barWidth = 1/len(self.liste_entites)
+        n = len(self.liste_entites)
+        #après une reprise, dict_general ne commence qu'au pas de reprise : on compte jusqu'à son dernier pas
+        nb_pas=max(self.dict_general, default=-1)+1 if self.historique is None else self.historique.nb_pas
+        nb_couleurs = max([info.id for info in self.liste_infos], default=0)+1
         
-        #On définit une couleur aléatoire pour chaque information... On considère qu'il y a moins de 250 informations, sinon ça bug
-        r=sample(range(0,255),len(self.liste_infos))
-        g=sample(range(0,255),len(self.liste_infos))
-        b=sample(range(0,255),len(self.liste_infos))
-        rgb=[[(r[i]/255),(g[i]/255),(b[i]/255)] for i in range(len(self.liste_infos))]
+        #On rassemble les cellules (pas, entité, rang de l'info dans l'entité, info) visibles
+        pas_cell, entite_cell, hauteur_cell, info_cell = [], [], [], []
+        for pas, vue in self.vues_historique():
+            for rang, entite in enumerate(vue):
+                for hauteur, info in enumerate(vue[entite]):
+                    pas_cell.append(pas); entite_cell.append(rang)
+                    hauteur_cell.append(hauteur); info_cell.append(int(info))
+        pas_cell, entite_cell = np.array(pas_cell, dtype=np.int64), np.array(entite_cell, dtype=np.int64)
+        hauteur_cell, info_cell = np.array(hauteur_cell, dtype=np.int64), np.array(info_cell, dtype=np.int64)
         
-        ######On trace ensuite les barplot pour chaque pas
-        #intitialisation des variables
-        fig=plt.figure("Propagation des informations dans la dernière simulation")
+        if fichier is None:
+            import matplotlib.pyplot as plt
+            fig=plt.figure("Propagation des informations dans la dernière simulation")
+        else:
+            #figure sans pyplot : le backend (Agg, SVG...) est choisi d'après l'extension
+            from matplotlib.figure import Figure
+            fig=Figure(figsize=(12, 6))
         ax=fig.add_subplot(111)
-        entite_labels=[]
-        entite_xticks=[]
-        
-        #On trace chaque barplot et on remplit la liste de labels et de ticks pour la légende
-        for pas in self.dict_general:
-            x_tics=[X[pas]]
-            for entite in self.dict_general[pas]:
-                nb_info=0
-                x_tics.append(x_tics[-1]+3*barWidth)
-                for info in self.dict_general[pas][str(entite)]:
-                    #on trace des barplot superposés pour chaque info d'une entite
-                    ax.bar(x_tics[-1],height=1, bottom=nb_info,color=rgb[int(info)], width=barWidth)
-                    nb_info+=1
-                if len(self.dict_general[pas][str(entite)])>0:
-                    entite_labels.append(str(entite))
-                    entite_xticks.append(x_tics[-1])
-                    
-        #ajouter les label box pour chaque info dans la légende:
-        for info in self.liste_infos:
-            info=info.id
-            ax.bar(0,0,color=rgb[int(info)],label=str(info))
-
-        #rajouter la légende
-        ax.legend(title="informations")
-        ax.set_xticks(entite_xticks)
-        ax.set_xticklabels(entite_labels)
+        cmap = matplotlib.colormaps[carte_couleurs]
+        
+        if mode == "carte":
+            carte = np.zeros((max(nb_pas, 1), n), dtype=np.int64)
+            np.add.at(carte, (pas_cell, entite_cell), 1)
+            image = ax.imshow(carte.T, aspect="auto", origin="lower", interpolation="nearest", cmap=cmap)
+            fig.colorbar(image, ax=ax, label="informations visibles")
+            ax.set_xlabel('pas de temps', fontsize=11)
+            ax.set_ylabel('entités', fontsize=11)
+        else:
+            from matplotlib.collections import PolyCollection
+            #Pour être sûr d'avoir la place, on met autant d'espace entre chaque pas qu'il y a d'entités
+            barWidth = 1/n
+            x = pas_cell*n + 3*barWidth*(entite_cell+1)
+            sommets = np.empty((len(x), 4, 2))
+            sommets[:, :, 0] = (x-barWidth/2)[:, None] + np.array([0, barWidth, barWidth, 0])
+            sommets[:, :, 1] = hauteur_cell[:, None] + np.array([0, 0, 1, 1])
+            #On répartit les couleurs des informations sur la carte de couleurs, dans un ordre mélangé
+            #pour que deux informations d'identifiants proches aient des couleurs différentes
+            teintes = (np.arange(nb_couleurs)*0.618033988749895) % 1
+            ax.add_collection(PolyCollection(sommets, facecolors=cmap(teintes[info_cell]), edgecolors="none"))
+            ax.set_xlim(-barWidth, max(nb_pas, 1)*n)
+            ax.set_ylim(0, max(hauteur_cell.max(initial=0)+1, 1))
+            
+            #ajouter les label box pour chaque info dans la légende, ou une échelle s'il y en a trop
+            if nb_couleurs <= 20:
+                from matplotlib.patches import Patch
+                ax.legend(handles=[Patch(color=cmap(teintes[i]), label=str(i)) for i in range(nb_couleurs)], title="informations")
+            
+            #les étiquettes des entités qui ont des informations, s'il n'y en a pas trop
+            occupees = np.unique(pas_cell*n + entite_cell)
+            if len(occupees) <= 200:
+                ax.set_xticks(occupees//n*n + 3*barWidth*(occupees % n + 1))
+                ax.set_xticklabels([str(e) for e in (occupees % n).tolist()])
+            ax.set_xlabel('entités groupées par pas de temps', fontsize=11)
+            ax.set_ylabel('informations', fontsize=11)
+        
         fig.suptitle('propagation des informations durant la simulation', fontsize=13)
-        plt.xlabel('entités groupées par pas de temps', fontsize=11)
-        plt.ylabel('informations', fontsize=11)
+        if fichier is not None:
+            fig.savefig(fichier)
              
         
-    def bilan(self):
+    def bilan(self, graphiques=True, fichier=None, diametre="exact"):
         """
+        Arguments :
+            - graphiques : trace le graphe de propagation (graphe_immeuble) (bool)
+            - fichier : fichier CSV ou NPZ où écrire les caractéristiques des informations
+            et le diamètre, voir resultats_infos() (str ou None)
+            - diametre : mode de calcul_diametre(), "exact" ou "approche" (borne
+            inférieure, pour les grands réseaux), ou None pour ne pas le calculer
         Objectif :
         Renvoie un bilan de toutes les informations d'une simulation donnée
         """
         #self.graphe()
-        self.graphe_immeuble()
-        self.calcule_diametre()
-        print("Diamètre du graphe : ", self.diametre)
+        if graphiques:
+            self.graphe_immeuble()
+        resultats = self.resultats_infos()
+        if diametre is not None:
+            self.calcule_diametre(mode=diametre)
+            resultats.proprietes["diametre"] = self.diametre
+            print("Diamètre du graphe : ", self.diametre)
+        if fichier is not None:
+            resultats.ecrit(fichier)
         #self.graphe_immeuble()
         print("Caractéristiques des informations de la dernière simulation : ")
-        bilan_info = np.array([["Id","Temps passé dans le réseau","nbre d'entités qui l'ont consultées", "nbre d'entités qui l'ont apprécié"]])
+        print(resultats)
+        return resultats
+    
+    
+    def resultats_infos(self):
+        """
+        Objectif :
+        Renvoie les caractéristiques des informations de la dernière simulation
+        (id, temps passé dans le réseau, nombre d'entités qui l'ont consultée, qui
+        l'ont appréciée, qui l'ont reçue et pic d'entités pour lesquelles elle était
+        visible en même temps), rangées en colonnes (ResultatsInfos)
+        """
+        return ResultatsInfos.depuis_infos(self.liste_infos)
+    
+    
+    def metriques_infos(self):
+        """
+        Objectif :
+        Renvoie les caractéristiques des informations affichées par bilan(), sous
+        forme d'un tableau d'entiers (une ligne par information) dont les colonnes
+        sont : id, temps passé dans le réseau, nombre d'entités qui l'ont consultée,
+        nombre d'entités qui l'ont appréciée (np.array)
+        """
+        return self.resultats_infos().tableau()[:, :4]
+
+
+
+#noms des colonnes de reseau.metriques_infos() agrégées par les simulations en série
+METRIQUES = ("temps_reseau", "nb_consult", "nb_appr")
+
+
+def _replication(parametres, graine):
+    """
+    Arguments :
+        - parametres : dictionnaire des arguments de simulations_monte_carlo
+        - graine : flux aléatoire propre à la réplication (numpy.random.SeedSequence)
+    Objectif :
+    Construit le réseau, fait tourner une simulation et renvoie seulement les
+    métriques de ses informations (temps, consultations, appréciations)
+    """
+    #les probabilités des entités, les connexions et les deux moteurs utilisent le même générateur
+    rng = np.random.default_rng(graine)
+    R = reseau(parametres["nb_entites"], parametres["groupes"], parametres["bp_seuil"], parametres["mp_seuil"], graine=rng,
+               topologie=parametres["topologie"])
+    if parametres["vectorise"]:
+        R.simulation_vectorisee(parametres["pas_max_simul"], parametres["nbre_infos"], parametres["pas_max_info"], graine=rng, historique=HistoriqueVide(),
+                                arrivees=parametres["arrivees"])
+    else:
+        R.simulation(parametres["pas_max_simul"], parametres["nbre_infos"], parametres["pas_max_info"], historique=HistoriqueVide(), graine=rng,
+                     arrivees=parametres["arrivees"])
+    return R.metriques_infos()[:, 1:]
+
+
+def simulations_monte_carlo(nb_replications, nb_entites, groupes, bp_seuil, mp_seuil, pas_max_simul, nbre_infos, pas_max_info,
+                            graine=None, processus=None, vectorise=True, quantiles=(0.05, 0.5, 0.95), topologie=None,
+                            arrivees=None):
+    """
+    Arguments :
+        - nb_replications : nombre de simulations indépendantes (int)
+        - nb_entites, groupes, bp_seuil, mp_seuil : arguments du constructeur de reseau
+        - pas_max_simul, nbre_infos, pas_max_info : arguments de reseau.simulation
+        - graine : graine de la série (int ou None). Chaque réplication reçoit son
+        propre flux aléatoire engendré depuis numpy.random.SeedSequence(graine),
+        la série est donc reproductible quel que soit le nombre de processus.
+        - processus : nombre de processus (int, None pour un par coeur)
+        - vectorise : utilise simulation_vectorisee() plutôt que simulation() (bool)
+        - quantiles : quantiles à calculer (tuple de float dans [0,1])
+        - topologie : fonction qui tire les connexions de chaque réseau, voir
+        reseau.__init__ (fonction du module ou functools.partial, ou None)
+        - arrivees : processus d'arrivée des informations, voir reseau.simulation()
+        (fonction du module ou functools.partial, ou None)
         
-        for i in self.liste_infos:
-            compteur_appr = 0
-            for j in i.dico_consult_appr.values() :
-                if j ==1 :
-                    compteur_appr += 1
-                    
-            a = np.array([[i.id,i.temps_reseau,len(i.dico_consult_appr),compteur_appr]])
-            bilan_info = np.append(bilan_info,a,axis=0)
+    Objectif :
+    Fait tourner nb_replications simulations indépendantes (un nouveau réseau par
+    réplication) dans un groupe de processus. Les processus ne renvoient que les
+    métriques des informations, pas les entités. Renvoie un dictionnaire :
+        - "valeurs" : pour chaque métrique de METRIQUES, tableau réplications x
+        informations des valeurs (np.array)
+        - pour chaque métrique : dictionnaire {"moyenne", "ecart_type", "quantiles"}
+        calculé sur toutes les informations de toutes les réplications
+    """
+    parametres = {"nb_entites": nb_entites, "groupes": groupes, "bp_seuil": bp_seuil, "mp_seuil": mp_seuil,
+                  "pas_max_simul": pas_max_simul, "nbre_infos": nbre_infos, "pas_max_info": pas_max_info,
+                  "vectorise": vectorise, "topologie": topologie, "arrivees": arrivees}
+    graines = np.random.SeedSequence(graine).spawn(nb_replications)
+    if processus == 1:
+        resultats = [_replication(parametres, g) for g in graines]
+    else:
+        with ProcessPoolExecutor(processus) as pool:
+            resultats = list(pool.map(_replication, [parametres]*nb_replications, graines))
+    
+    valeurs = np.stack(resultats)
+    bilan_serie = {"valeurs": {}}
+    for rang, nom in enumerate(METRIQUES):
+        v = valeurs[:, :, rang]
+        bilan_serie["valeurs"][nom] = v
+        bilan_serie[nom] = {"moyenne": float(v.mean()), "ecart_type": float(v.std()),
+                            "quantiles": dict(zip(quantiles, np.quantile(v, quantiles).tolist()))}
+    return bilan_serie
+
+
+class StatistiquesEnLigne(object):
+    """
+    Moyenne et variance d'une série de vecteurs de même taille, mises à jour à
+    chaque nouvelle valeur sans garder la série (algorithme de Welford).
+    
+    Attributs :
+        - nb : nombre de valeurs ajoutées (int)
+        - moyenne : moyenne de chaque composante (np.array)
+    
+    Méthodes :
+        - ajoute(self, valeurs) :
+        Ajoute une valeur à la série
+        - variance(self) :
+        Renvoie la variance (non biaisée) de chaque composante
+        - demi_largeur(self, z) :
+        Renvoie la demi-largeur de l'intervalle de confiance de la moyenne de
+        chaque composante, pour le quantile z de la loi normale
+    """
+    
+    def __init__(self, taille):
+        self.nb = 0
+        self.moyenne = np.zeros(taille)
+        self._m2 = np.zeros(taille)
+    
+    def ajoute(self, valeurs):
+        self.nb += 1
+        ecart = valeurs-self.moyenne
+        self.moyenne = self.moyenne + ecart/self.nb
+        self._m2 = self._m2 + ecart*(valeurs-self.moyenne)
+    
+    def variance(self):
+        if self.nb < 2:
+            return np.full(len(self.moyenne), np.inf)
+        return self._m2/(self.nb-1)
+    
+    def demi_largeur(self, z):
+        return z*np.sqrt(self.variance()/max(self.nb, 1))
+
+
+def simulations_adaptatives(nb_entites, groupes, bp_seuil, mp_seuil, pas_max_simul, nbre_infos, pas_max_info,
+                            precision=0.05, confiance=0.95, nb_min=10, nb_max=1000, graine=None, processus=None,
+                            vectorise=True, topologie=None, arrivees=None):
+    """
+    Arguments :
+        - nb_entites, ..., pas_max_info, graine, processus, vectorise, topologie,
+        arrivees : voir simulations_monte_carlo
+        - precision : demi-largeur relative visée des intervalles de confiance (float)
+        - confiance : niveau de confiance des intervalles (float dans ]0,1[)
+        - nb_min, nb_max : nombres minimal et maximal de réplications (int)
+        
+    Objectif :
+    Fait tourner des réplications comme simulations_monte_carlo, par lots d'une
+    réplication par processus, et s'arrête dès que l'intervalle de confiance de la
+    moyenne de chaque métrique de METRIQUES (moyenne sur les informations d'une
+    réplication) a une demi-largeur inférieure à precision fois sa moyenne.
+    Les réplications sont prises en compte dans l'ordre de leurs graines : le
+    nombre utilisé ne dépend pas du nombre de processus. Renvoie un dictionnaire :
+        - "nb_replications" : nombre de réplications utilisées (int)
+        - "converge" : la précision a été atteinte avant nb_max (bool)
+        - "valeurs" : pour chaque métrique, moyenne de chaque réplication (np.array)
+        - pour chaque métrique : dictionnaire {"moyenne", "ecart_type", "demi_largeur"}
+    """
+    parametres = {"nb_entites": nb_entites, "groupes": groupes, "bp_seuil": bp_seuil, "mp_seuil": mp_seuil,
+                  "pas_max_simul": pas_max_simul, "nbre_infos": nbre_infos, "pas_max_info": pas_max_info,
+                  "vectorise": vectorise, "topologie": topologie, "arrivees": arrivees}
+    z = NormalDist().inv_cdf((1+confiance)/2)
+    if processus is None:
+        processus = os.cpu_count()
+    suite_graines = np.random.SeedSequence(graine)
+    statistiques = StatistiquesEnLigne(len(METRIQUES))
+    valeurs = []
+    
+    def converge():
+        if statistiques.nb < max(nb_min, 2):
+            return False
+        return bool((statistiques.demi_largeur(z) <= precision*np.abs(statistiques.moyenne)).all())
+    
+    with contextlib.ExitStack() as pile:
+        pool = pile.enter_context(ProcessPoolExecutor(processus)) if processus > 1 else None
+        while len(valeurs) < nb_max and not converge():
+            #On lance un lot de réplications, dont on ne garde que celles nécessaires
+            graines = suite_graines.spawn(min(max(processus, 1), nb_max-len(valeurs)))
+            if pool is None:
+                resultats = (_replication(parametres, g) for g in graines)
+            else:
+                resultats = pool.map(_replication, [parametres]*len(graines), graines)
+            for resultat in resultats:
+                valeurs.append(resultat.mean(axis=0))
+                statistiques.ajoute(valeurs[-1])
+                if converge():
+                    break
+    
+    valeurs = np.array(valeurs).reshape(-1, len(METRIQUES))
+    bilan_serie = {"nb_replications": len(valeurs), "converge": converge(), "valeurs": {}}
+    for rang, nom in enumerate(METRIQUES):
+        bilan_serie["valeurs"][nom] = valeurs[:, rang]
+        bilan_serie[nom] = {"moyenne": float(statistiques.moyenne[rang]),
+                            "ecart_type": float(np.sqrt(statistiques.variance()[rang])),
+                            "demi_largeur": float(statistiques.demi_largeur(z)[rang])}
+    return bilan_serie
+
+
+
+#paramètres d'un point de balayage, et ceux qui définissent les connexions du réseau
+PARAMETRES_BALAYAGE = ("nb_entites", "graine", "groupes", "bp_seuil", "mp_seuil", "pas_max_simul", "nbre_infos", "pas_max_info")
+PARAMETRES_TOPOLOGIE = ("nb_entites", "graine")
+
+
+def _description_arrivees(arrivees):
+    """
+    Argument :
+        - arrivees : processus d'arrivée des informations (fonction ou functools.partial)
+    Objectif :
+    Renvoie une description stable (sérialisable en JSON) du processus, pour
+    l'empreinte des points de balayage()
+    """
+    if isinstance(arrivees, functools.partial):
+        valeur = lambda v: v.tolist() if isinstance(v, np.ndarray) else v
+        return [_description_arrivees(arrivees.func), [valeur(v) for v in arrivees.args],
+                {nom: valeur(v) for nom, v in arrivees.keywords.items()}]
+    #(par son seul nom : le module s'appelle __main__ quand il est lancé en ligne de commande)
+    return arrivees.__qualname__
+
+
+def balayage(grille, defauts, dossier_cache=None, vectorise=True, arrivees=None):
+    """
+    Arguments :
+        - grille : dictionnaire {nom de paramètre : liste de valeurs} (voir
+        PARAMETRES_BALAYAGE), on simule tous les points de leur produit cartésien
+        - defauts : valeurs des paramètres qui ne sont pas dans la grille (dictionnaire)
+        - dossier_cache : dossier où sont gardés les points déjà calculés (str ou None)
+        - vectorise : utilise simulation_vectorisee() plutôt que simulation() (bool)
+        - arrivees : processus d'arrivée des informations de tous les points, voir
+        reseau.simulation() ; il entre dans l'empreinte des points (fonction du
+        module, éventuellement avec functools.partial, ou None)
         
-        print(bilan_info)
+    Objectifs :
+     - Les points qui ont la même topologie (nb_entites et graine) partagent un
+     seul réseau, construit une fois : pour chaque point on retire seulement les
+     probabilités des entités (reechantillonne_probabilites) avant de simuler.
+     - Chaque point a son propre flux aléatoire, tiré de sa graine et de ses
+     paramètres : son résultat ne dépend pas de l'ordre de calcul des points.
+     - Chaque point calculé est écrit dans dossier_cache (un fichier JSON nommé
+     d'après l'empreinte de ses paramètres) : un balayage interrompu ou étendu ne
+     calcule que les points manquants (ou dont le fichier est illisible). Les points sans graine (None) sont tirés
+     avec un flux non reproductible et ne sont jamais mis en cache.
+     
+    Renvoie la liste des résultats, dans l'ordre de la grille. Chaque résultat est
+    un dictionnaire avec les paramètres du point ("parametres"), les métriques
+    de ses informations ("metriques", voir reseau.metriques_infos) et leurs
+    moyennes (une clé par nom de METRIQUES).
+    """
+    noms = list(grille.keys())
+    points = []
+    for valeurs in itertools.product(*[grille[nom] for nom in noms]):
+        point = dict(defauts)
+        point.update(zip(noms, valeurs))
+        points.append({nom: point[nom] for nom in PARAMETRES_BALAYAGE})
+    if dossier_cache is not None:
+        os.makedirs(dossier_cache, exist_ok=True)
+    
+    resultats = [None]*len(points)
+    a_calculer = {}
+    for rang, point in enumerate(points):
+        cle = [point, vectorise] if arrivees is None else [point, vectorise, _description_arrivees(arrivees)]
+        empreinte = hashlib.sha1(json.dumps(cle, sort_keys=True).encode()).hexdigest()
+        #un point sans graine n'est pas reproductible : on ne le met pas en cache
+        chemin = None if dossier_cache is None or point["graine"] is None else os.path.join(dossier_cache, empreinte+".json")
+        if chemin is not None and os.path.exists(chemin):
+            try:
+                with open(chemin) as fichier:
+                    resultats[rang] = json.load(fichier)
+            except (OSError, ValueError):
+                #fichier illisible (écriture d'une ancienne version interrompue) : le point est recalculé
+                resultats[rang] = None
+        if resultats[rang] is None:
+            topologie = tuple(point[nom] for nom in PARAMETRES_TOPOLOGIE)
+            a_calculer.setdefault(topologie, []).append((rang, point, empreinte, chemin))
+    
+    for (nb_entites, graine), liste in a_calculer.items():
+        point = liste[0][1]
+        R = reseau(nb_entites, point["groupes"], point["bp_seuil"], point["mp_seuil"], graine=graine)
+        for rang, point, empreinte, chemin in liste:
+            #les probabilités et la simulation du point utilisent le même générateur
+            flux = np.random.default_rng(np.random.SeedSequence(None if graine is None else [graine, int(empreinte[:8], 16)]))
+            R.reinitialise_simulation()
+            R.reechantillonne_probabilites(point["groupes"], point["bp_seuil"], point["mp_seuil"], graine=flux)
+            if vectorise:
+                R.simulation_vectorisee(point["pas_max_simul"], point["nbre_infos"], point["pas_max_info"], graine=flux, historique=HistoriqueVide(),
+                                        arrivees=arrivees)
+            else:
+                R.simulation(point["pas_max_simul"], point["nbre_infos"], point["pas_max_info"], historique=HistoriqueVide(), graine=flux,
+                             arrivees=arrivees)
+            metriques = R.metriques_infos()
+            resultat = {"parametres": point, "metriques": metriques.tolist()}
+            for colonne, nom in enumerate(METRIQUES):
+                resultat[nom] = float(metriques[:, colonne+1].mean()) if len(metriques) else 0.
+            if chemin is not None:
+                #écriture dans un fichier temporaire puis renommage : un fichier du cache est toujours complet
+                temporaire = chemin+".tmp"
+                with open(temporaire, "w") as fichier:
+                    json.dump(resultat, fichier)
+                os.replace(temporaire, chemin)
+            resultats[rang] = resultat
+    return resultats
+
+
+def _mesure_phase(mesures, nom, trace, fonction, *arguments, **options):
+    """
+    Objectif :
+    Fait tourner fonction(*arguments, **options) et stocke dans mesures[nom]
+    son temps d'exécution (s, "temps") si trace est faux, sinon le pic de mémoire
+    allouée pendant son exécution (octets, "memoire_pic", mesuré avec tracemalloc
+    qui suit aussi les tableaux numpy). Le suivi de tracemalloc ralentit beaucoup
+    le code : les deux mesures se font donc dans deux exécutions séparées.
+    Renvoie le résultat de la fonction.
+    """
+    if not trace:
+        debut = time.perf_counter()
+        resultat = fonction(*arguments, **options)
+        mesures.setdefault(nom, {})["temps"] = time.perf_counter()-debut
+        return resultat
+    tracemalloc.start()
+    try:
+        resultat = fonction(*arguments, **options)
+        _, pic = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    mesures.setdefault(nom, {})["memoire_pic"] = pic
+    return resultat
+
+
+def _phases_benchmark(mesures, trace, n, infos, pas_info, pas_max_simul, graine):
+    """
+    Objectif :
+    Fait tourner une fois les phases d'un point de benchmark() et les mesure
+    avec _mesure_phase (temps, ou mémoire si trace est vrai)
+    """
+    R = _mesure_phase(mesures, "construction", trace, reseau, n, [n//2, n-n//2], 0.2, 0.8, graine=graine)
+    _mesure_phase(mesures, "simulation", trace, R.simulation, pas_max_simul, infos, pas_info, graine=R.rng)
+    _mesure_phase(mesures, "dico_general", trace, R.dico_general, len(R.dict_general))
+    _mesure_phase(mesures, "calcule_diametre", trace, R.calcule_diametre)
+    #le diamètre et le graphique sont mesurés à part : bilan ne fait que le tableau des informations
+    with open(os.devnull, "w") as nul, contextlib.redirect_stdout(nul):
+        _mesure_phase(mesures, "bilan", trace, R.bilan, graphiques=False, diametre=None)
+    if importlib.util.find_spec("matplotlib") is not None:
+        #figure rendue en PNG et jetée, sans fenêtre
+        _mesure_phase(mesures, "graphe_immeuble", trace, R.graphe_immeuble, fichier=os.devnull)
+    R.reinitialise_simulation()
+    _mesure_phase(mesures, "simulation_vectorisee", trace, R.simulation_vectorisee, pas_max_simul, infos, pas_info, graine=graine)
+
+
+def benchmark(nb_entites=(50, 200, 1000), nbre_infos=(10, 100), pas_max_info=(3, 10), pas_max_simul=1000,
+              graine=0, fichier="benchmark.json"):
+    """
+    Arguments :
+        - nb_entites, nbre_infos, pas_max_info : valeurs à mesurer (tuples d'int),
+        on mesure tous les points de leur produit cartésien
+        - pas_max_simul : argument de reseau.simulation (int)
+        - graine : graine de chaque point de mesure (int)
+        - fichier : fichier JSON où sont écrits les résultats (str ou None)
         
+    Objectif :
+    Mesure, pour chaque point, le temps et le pic de mémoire des phases
+    construction (reseau.__init__), simulation, simulation_vectorisee,
+    dico_general, calcule_diametre, bilan (sans diamètre, graphique ni affichage)
+    et, si matplotlib est installé, graphe_immeuble (figure rendue sans fenêtre).
+    Chaque point est tiré avec la même graine et tourne deux fois, une pour les
+    temps et une, sous tracemalloc, pour la mémoire : deux fichiers de résultats
+    se comparent avec compare_benchmarks(). Renvoie les résultats (dictionnaire).
+    """
+    resultats = {"machine": {"python": platform.python_version(), "numpy": np.__version__,
+                             "processeur": platform.processor(), "nb_coeurs": os.cpu_count()},
+                 "parametres": {"pas_max_simul": pas_max_simul, "graine": graine},
+                 "mesures": []}
+    for n, infos, pas_info in itertools.product(nb_entites, nbre_infos, pas_max_info):
+        mesures = {}
+        for trace in (False, True):
+            _phases_benchmark(mesures, trace, n, infos, pas_info, pas_max_simul, graine)
+        resultats["mesures"].append({"nb_entites": n, "nbre_infos": infos, "pas_max_info": pas_info, "phases": mesures})
+    
+    if fichier is not None:
+        with open(fichier, "w") as f:
+            json.dump(resultats, f, indent=1)
+    return resultats
+
+
+def compare_benchmarks(ancien, nouveau, tolerance=1.2):
+    """
+    Arguments :
+        - ancien, nouveau : résultats de benchmark() ou chemins de leurs fichiers JSON
+        - tolerance : rapport nouveau/ancien au-delà duquel on signale une régression (float)
+    Objectif :
+    Renvoie la liste des régressions, un tuple (nb_entites, nbre_infos, pas_max_info,
+    phase, mesure, rapport) par point, phase et mesure ("temps" ou "memoire_pic")
+    qui dépasse la tolérance.
+    """
+    if isinstance(ancien, str):
+        with open(ancien) as f:
+            ancien = json.load(f)
+    if isinstance(nouveau, str):
+        with open(nouveau) as f:
+            nouveau = json.load(f)
+    cle = lambda m: (m["nb_entites"], m["nbre_infos"], m["pas_max_info"])
+    anciennes = {cle(m): m["phases"] for m in ancien["mesures"]}
+    regressions = []
+    for m in nouveau["mesures"]:
+        if cle(m) not in anciennes:
+            continue
+        for phase, valeurs in m["phases"].items():
+            for mesure, valeur in valeurs.items():
+                reference = anciennes[cle(m)].get(phase, {}).get(mesure)
+                if reference and valeur/reference > tolerance:
+                    regressions.append(cle(m)+(phase, mesure, valeur/reference))
+    return regressions
+
 """
 CODE PRINCIPAL
 """        
 
-#a = Entite("1","bp",0.3,0.7)
-#info_1 = information(0)
-
+def main(arguments=None):
+    """
+    Argument :
+        - arguments : arguments de la ligne de commande (liste de str, None pour sys.argv)
+    Objectif :
+    Point d'entrée en ligne de commande. Construit un réseau, fait tourner une
+    simulation sans affichage et écrit le bilan des informations dans un fichier
+    CSV (ou, avec --replications, le bilan agrégé de plusieurs simulations en
+    JSON). --demo lance la démonstration avec les graphiques.
+    """
+    parser = argparse.ArgumentParser(description="Simulation de la propagation d'informations dans un réseau")
+    parser.add_argument("--nb-entites", type=int, default=5)
+    parser.add_argument("--groupes", type=int, nargs=2, default=[1, 4], metavar=("BP", "MP"),
+                        help="nombre d'entités bon public et mauvais public")
+    parser.add_argument("--bp-seuil", type=float, default=0.2)
+    parser.add_argument("--mp-seuil", type=float, default=0.8)
+    parser.add_argument("--pas-max-simul", type=int, default=15)
+    parser.add_argument("--nbre-infos", type=int, default=5)
+    parser.add_argument("--pas-max-info", type=int, default=3)
+    parser.add_argument("--graine", type=int, default=None)
+    parser.add_argument("--topologie", choices=("p_conn", "erdos_renyi", "barabasi_albert", "watts_strogatz"), default="p_conn",
+                        help="modèle de connexions du réseau")
+    parser.add_argument("--degre", type=int, default=6, help="degré moyen visé par --topologie (hors p_conn)")
+    parser.add_argument("--aretes", default=None,
+                        help="fichier de connexions (texte, ou paires d'int32 en .bin/.i32) à la place de --topologie")
+    parser.add_argument("--vectorise", action="store_true", help="utilise simulation_vectorisee()")
+    parser.add_argument("--parallele", action="store_true",
+                        help="utilise simulation_parallele() avec --processus processus (simulation unique)")
+    groupe_arrivees = parser.add_mutually_exclusive_group()
+    groupe_arrivees.add_argument("--infos-par-pas", type=int, default=None, help="informations injectées à chaque pas (1 par défaut)")
+    groupe_arrivees.add_argument("--taux-arrivees", type=float, default=None,
+                                 help="arrivées de Poisson : nombre moyen d'informations injectées par pas")
+    groupe_arrivees.add_argument("--calendrier", default=None,
+                                 help="fichier texte des pas d'injection, une information par ligne (voir lit_calendrier)")
+    parser.add_argument("--replications", type=int, default=1,
+                        help="nombre de simulations indépendantes (voir simulations_monte_carlo)")
+    parser.add_argument("--precision", type=float, default=None,
+                        help="précision relative visée : réplications jusqu'à convergence (voir simulations_adaptatives),"
+                             " au plus --replications si donné")
+    parser.add_argument("--processus", type=int, default=None)
+    parser.add_argument("--sortie", default="bilan.csv", help="fichier du bilan (CSV ou NPZ, ou JSON avec --replications ou --precision)")
+    parser.add_argument("--diametre", choices=("exact", "approche", "aucun"), default="exact",
+                        help="calcul du diamètre écrit dans le bilan : exact, approché (grands réseaux) ou aucun")
+    parser.add_argument("--demo", action="store_true", help="démonstration avec graphiques")
+    args = parser.parse_args(arguments)
+    
+    if args.demo:
+        #a = Entite("1","bp",0.3,0.7)
+        #info_1 = information(0)
+        import matplotlib.pyplot as plt
+        groupe=[1,4]
+        R=reseau(5,groupe,0.2,0.8)
+        R.simulation(15,5,3)
+        R.bilan()
+        R.graphe()
+        plt.show()
+        return
+    
+    topologie = {"p_conn": None,
+                 "erdos_renyi": functools.partial(topologie_erdos_renyi, p=args.degre/max(args.nb_entites-1, 1)),
+                 "barabasi_albert": functools.partial(topologie_barabasi_albert, m=max(args.degre//2, 1)),
+                 "watts_strogatz": functools.partial(topologie_watts_strogatz, k=args.degre)}[args.topologie]
+    nb_entites, groupes = args.nb_entites, args.groupes
+    if args.aretes is not None:
+        topologie = functools.partial(topologie_fichier, chemin=args.aretes)
+        #taille et groupes comme dans reseau.depuis_fichier
+        nb_entites, groupes = _dimensions_aretes(*lit_aretes(args.aretes), args.groupes)
+    
+    arrivees = None
+    if args.infos_par_pas is not None:
+        arrivees = functools.partial(arrivees_par_pas, k=args.infos_par_pas)
+    elif args.taux_arrivees is not None:
+        arrivees = functools.partial(arrivees_poisson, taux=args.taux_arrivees)
+    elif args.calendrier is not None:
+        arrivees = functools.partial(arrivees_calendrier, calendrier=lit_calendrier(args.calendrier))
+    
+    if args.precision is not None:
+        bilan_serie = simulations_adaptatives(nb_entites, groupes, args.bp_seuil, args.mp_seuil,
+                                              args.pas_max_simul, args.nbre_infos, args.pas_max_info, precision=args.precision,
+                                              nb_max=args.replications if args.replications > 1 else 1000,
+                                              graine=args.graine, processus=args.processus, vectorise=args.vectorise,
+                                              topologie=topologie, arrivees=arrivees)
+    elif args.replications > 1:
+        bilan_serie = simulations_monte_carlo(args.replications, nb_entites, groupes, args.bp_seuil, args.mp_seuil,
+                                              args.pas_max_simul, args.nbre_infos, args.pas_max_info,
+                                              graine=args.graine, processus=args.processus, vectorise=args.vectorise,
+                                              topologie=topologie, arrivees=arrivees)
+    if args.precision is not None or args.replications > 1:
+        bilan_serie["valeurs"] = {nom: v.tolist() for nom, v in bilan_serie["valeurs"].items()}
+        with open(args.sortie, "w") as fichier:
+            json.dump(bilan_serie, fichier, indent=1)
+        return
+    
+    if args.aretes is not None:
+        R = reseau.depuis_fichier(args.aretes, args.groupes, args.bp_seuil, args.mp_seuil, graine=args.graine)
+    else:
+        R = reseau(args.nb_entites, args.groupes, args.bp_seuil, args.mp_seuil, graine=args.graine, topologie=topologie)
+    if args.parallele:
+        R.simulation_parallele(args.pas_max_simul, args.nbre_infos, args.pas_max_info, processus=args.processus,
+                               graine=args.graine, historique=HistoriqueVide(), arrivees=arrivees, etat_entites=False)
+    elif args.vectorise:
+        R.simulation_vectorisee(args.pas_max_simul, args.nbre_infos, args.pas_max_info, graine=args.graine, historique=HistoriqueVide(),
+                                arrivees=arrivees)
+    else:
+        R.simulation(args.pas_max_simul, args.nbre_infos, args.pas_max_info, historique=HistoriqueVide(), graine=R.rng if args.graine is not None else None,
+                     arrivees=arrivees)
+    R.bilan(graphiques=False, fichier=args.sortie, diametre=None if args.diametre == "aucun" else args.diametre)
 
-groupe=[1,4]
-R=reseau(5,groupe,0.2,0.8)
-R.simulation(15,5,3)
-R.bilan()
-R.graphe()
 
-            
-            
-            
-        
-        
-            
-            
-            
-            
-            
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+"""
+Tests de non-régression de TP_reseau (python -m pytest).
+
+Les résultats de référence ont été relevés avec les graines indiquées : un
+changement qui les modifie doit être voulu (et les valeurs mises à jour).
+"""
+
+import functools
+import json
+import random
+
+import numpy as np
+import pytest
+
+import TP_reseau as tp
+
+
+def reseau_test(graine=7):
+    return tp.reseau(30, [15, 15], 0.2, 0.8, graine=graine)
+
+
+#métriques (id, temps_reseau, nb_consult, nb_appr) de reseau_test() après 40 pas, 6 infos, 3 pas par info
+REFERENCE_SIMULATION = [[0, 37, 24, 14], [1, 39, 22, 13], [2, 36, 23, 11], [3, 35, 1, 0], [4, 38, 19, 8], [5, 40, 22, 12]]
+REFERENCE_VECTORISEE = [[0, 36, 19, 9], [1, 35, 22, 11], [2, 37, 24, 12], [3, 40, 19, 9], [4, 38, 22, 11], [5, 39, 22, 10]]
+
+
+def aretes(debut, indices):
+    #paires (entité, voisin) d'une adjacence CSR
+    return set(zip(np.repeat(np.arange(len(debut)-1), np.diff(debut)).tolist(), indices.tolist()))
+
+
+GENERATEURS = [tp.topologie_erdos_renyi,
+               functools.partial(tp.topologie_erdos_renyi, p=0.3),
+               functools.partial(tp.topologie_erdos_renyi, nb_aretes=40),
+               tp.topologie_barabasi_albert,
+               tp.topologie_watts_strogatz]
+
+
+@pytest.mark.parametrize("generateur", GENERATEURS)
+@pytest.mark.parametrize("nb_entites", [0, 1, 2, 30])
+def test_topologies_bien_formees(generateur, nb_entites):
+    debut, indices = generateur(nb_entites, np.random.default_rng(1))
+    assert len(debut) == nb_entites+1 and debut[0] == 0 and debut[-1] == len(indices)
+    paires = aretes(debut, indices)
+    #voisins rangés, sans doublon ni boucle
+    assert len(paires) == len(indices)
+    assert all((np.diff(indices[debut[e]:debut[e+1]]) > 0).all() for e in range(nb_entites))
+    assert all(e != v for e, v in paires)
+    if nb_entites <= 1:
+        assert len(indices) == 0
+    #le réseau se construit avec toutes les topologies
+    R = tp.reseau(nb_entites, [nb_entites//2, nb_entites-nb_entites//2], 0.2, 0.8, graine=1, topologie=generateur)
+    assert R.taille == nb_entites
+
+
+@pytest.mark.parametrize("options", [{}, {"p": 0}, {"p": 1e-9}, {"nb_aretes": 0}])
+def test_erdos_renyi_vide(options):
+    debut, indices = tp.topologie_erdos_renyi(30, np.random.default_rng(1), **options)
+    assert len(indices) == 0 and (debut == 0).all()
+
+
+def test_nombres_de_connexions():
+    rng = np.random.default_rng(1)
+    assert len(tp.topologie_erdos_renyi(30, rng, nb_aretes=40)[1]) == 40
+    assert len(tp.topologie_erdos_renyi(30, rng, nb_aretes=10**6)[1]) == 30*29
+    assert len(tp.topologie_erdos_renyi(30, rng, p=1)[1]) == 30*29
+    #anneau sans recâblage : k voisins par entité
+    debut, _ = tp.topologie_watts_strogatz(30, rng, k=4, p=0)
+    assert (np.diff(debut) == 4).all()
+    #graphes non orientés : chaque connexion existe dans les deux sens
+    for generateur in (tp.topologie_barabasi_albert, tp.topologie_watts_strogatz):
+        paires = aretes(*generateur(200, rng))
+        assert paires == {(v, e) for e, v in paires}
+    _, indices = tp.topologie_barabasi_albert(200, rng, m=3)
+    assert len(indices) <= 2*3*200
+
+
+def test_simulation_graine_fixe():
+    R = reseau_test()
+    R.simulation(40, 6, 3, graine=7, historique=tp.HistoriqueVide())
+    assert R.metriques_infos().tolist() == REFERENCE_SIMULATION
+
+
+def test_simulation_vectorisee_graine_fixe():
+    R = reseau_test()
+    R.simulation_vectorisee(40, 6, 3, graine=7, historique=tp.HistoriqueVide())
+    assert R.metriques_infos().tolist() == REFERENCE_VECTORISEE
+
+
+@pytest.mark.parametrize("moteur", ["simulation", "simulation_vectorisee"])
+def test_historique_rejoue_dict_general(moteur):
+    #la même simulation, avec dict_general puis avec un historique de transitions
+    R = reseau_test()
+    getattr(R, moteur)(40, 6, 3, graine=3)
+    dict_general = R.dict_general
+    R = reseau_test()
+    historique = tp.HistoriqueTransitions()
+    getattr(R, moteur)(40, 6, 3, graine=3, historique=historique)
+
+    vues = dict(R.vues_historique())
+    assert sorted(vues) == sorted(dict_general)
+    for pas, vue in vues.items():
+        assert vue == dict_general[pas]
+        assert historique.vue(pas, R.taille) == dict_general[pas]
+
+
+def test_moteurs_meme_loi():
+    #moyennes de Monte Carlo des deux moteurs, à 5 erreurs types près
+    valeurs = {}
+    for vectorise in (False, True):
+        serie = tp.simulations_monte_carlo(150, 20, [10, 10], 0.2, 0.8, 30, 5, 3, graine=11, processus=1, vectorise=vectorise)
+        valeurs[vectorise] = np.stack([serie["valeurs"][nom].mean(axis=1) for nom in tp.METRIQUES], axis=1)
+    ecart = np.abs(valeurs[False].mean(axis=0)-valeurs[True].mean(axis=0))
+    erreur = np.sqrt(valeurs[False].var(axis=0)/150 + valeurs[True].var(axis=0)/150)
+    assert (ecart <= 5*erreur).all()
+
+
+def test_reseau_sans_graine_suit_random():
+    #sans graine, random.seed() fixe les probabilités et les connexions
+    tirages = []
+    for _ in range(2):
+        random.seed(1)
+        R = reseau_test(None)
+        tirages.append((R.voisins_debut.tolist(), R.voisins_indices.tolist(), [ent.p_cons for ent in R.liste_entites]))
+    assert tirages[0] == tirages[1]
+
+
+@pytest.mark.parametrize("graine", [5, None])
+def test_reprise_identique(tmp_path, graine):
+    #graine None : tirages du module random, dont l'état est aussi sauvegardé
+    random.seed(5)
+    R = reseau_test()
+    R.simulation(40, 8, 3, graine=graine, historique=tp.HistoriqueVide())
+    reference = R.metriques_infos()
+
+    #même simulation, arrêtée après le pas 12, sauvegardée puis reprise
+    random.seed(5)
+    R = reseau_test()
+    for evenements in R.simulation_flux(40, 8, 3, graine=graine):
+        if evenements.pas == 12:
+            break
+    chemin = str(tmp_path / "reprise.npz")
+    R.sauvegarde(chemin)
+    random.seed(999)
+    R = tp.reseau.depuis_sauvegarde(chemin)
+    R.simulation(40, 8, 3, historique=tp.HistoriqueVide(), reprise=True)
+    assert (R.metriques_infos() == reference).all()
+
+
+def test_parallele_reproductible_et_historique():
+    R = reseau_test()
+    R.simulation_parallele(40, 6, 3, processus=3, graine=4)
+    dict_general = R.dict_general
+    #l'état final recopié dans les entités est celui du dernier pas
+    dernier = dict_general[max(dict_general)]
+    assert all(set(ent.infos_actives) == set(dernier[ent.id]) for ent in R.liste_entites)
+    R = reseau_test()
+    historique = tp.HistoriqueTransitions()
+    R.simulation_parallele(40, 6, 3, processus=3, graine=4, historique=historique)
+    assert dict(R.vues_historique()) == dict_general
+
+
+def test_parallele_meme_loi():
+    #moyennes sur 60 simulations de simulation_parallele et simulation_vectorisee, à 5 erreurs types près
+    valeurs = {"simulation_parallele": [], "simulation_vectorisee": []}
+    for graine in range(60):
+        for moteur, options in (("simulation_parallele", {"processus": 2}), ("simulation_vectorisee", {})):
+            R = reseau_test(graine)
+            getattr(R, moteur)(30, 5, 3, graine=graine, historique=tp.HistoriqueVide(), **options)
+            valeurs[moteur].append(R.metriques_infos()[:, 1:].mean(axis=0))
+    parallele, vectorisee = np.array(valeurs["simulation_parallele"]), np.array(valeurs["simulation_vectorisee"])
+    ecart = np.abs(parallele.mean(axis=0)-vectorisee.mean(axis=0))
+    erreur = np.sqrt(parallele.var(axis=0)/60 + vectorisee.var(axis=0)/60)
+    assert (ecart <= 5*erreur).all()
+
+
+def test_balayage_reutilise_le_cache(tmp_path, monkeypatch):
+    defauts = {"nb_entites": 20, "groupes": [10, 10], "bp_seuil": 0.2, "mp_seuil": 0.8,
+               "pas_max_simul": 20, "nbre_infos": 4, "pas_max_info": 3, "graine": 2}
+    dossier = str(tmp_path)
+    premiers = tp.balayage({"bp_seuil": [0.2, 0.4]}, defauts, dossier_cache=dossier)
+    #un fichier tronqué (écriture interrompue) est recalculé
+    fichier_tronque = sorted(tmp_path.iterdir())[0]
+    fichier_tronque.write_text('{"parametres": ')
+
+    #grille étendue : seuls le nouveau point et le fichier tronqué sont simulés
+    simules = []
+    simulation_vectorisee = tp.reseau.simulation_vectorisee
+    def compte(R, *arguments, **options):
+        simules.append(R)
+        return simulation_vectorisee(R, *arguments, **options)
+    monkeypatch.setattr(tp.reseau, "simulation_vectorisee", compte)
+    etendus = tp.balayage({"bp_seuil": [0.2, 0.4, 0.6]}, defauts, dossier_cache=dossier)
+    assert len(simules) == 2
+    assert etendus[:2] == premiers
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+@pytest.mark.parametrize("extension", ["csv", "npz"])
+def test_bilan_ecrit_le_diametre(tmp_path, extension):
+    R = reseau_test()
+    R.simulation(40, 6, 3, graine=7, historique=tp.HistoriqueVide())
+    chemin = str(tmp_path / ("bilan." + extension))
+    R.bilan(graphiques=False, fichier=chemin)
+    relu = tp.ResultatsInfos.charge(chemin)
+    assert relu.proprietes == {"diametre": R.diametre}
+    assert (relu.tableau() == R.resultats_infos().tableau()).all()
+    #sans diamètre, le fichier n'a que les colonnes
+    R.bilan(graphiques=False, fichier=chemin, diametre=None)
+    assert tp.ResultatsInfos.charge(chemin).proprietes == {}
+
+
+@pytest.mark.parametrize("mode", ["carte", "barres"])
+def test_graphe_immeuble_apres_reprise(tmp_path, mode):
+    pytest.importorskip("matplotlib")
+    R = reseau_test()
+    for evenements in R.simulation_flux(40, 6, 3, graine=2):
+        if evenements.pas == 10:
+            break
+    chemin = str(tmp_path / "reprise.npz")
+    R.sauvegarde(chemin)
+    R = tp.reseau.depuis_sauvegarde(chemin)
+    R.simulation(40, 6, 3, reprise=True)
+    assert min(R.dict_general) > 0
+    image = tmp_path / "graphe.png"
+    R.graphe_immeuble(mode=mode, fichier=str(image))
+    assert image.stat().st_size > 0
+
+
+@pytest.mark.parametrize("options", [["--replications", "3"], ["--precision", "0.5", "--replications", "4"]])
+def test_cli_series_depuis_fichier(tmp_path, options):
+    #le fichier fixe la taille (40 entités) et les groupes par défaut sont remis à l'échelle
+    paires = np.random.default_rng(0).integers(0, 40, (200, 2))
+    paires[0] = [0, 39]
+    aretes_txt = tmp_path / "aretes.txt"
+    np.savetxt(str(aretes_txt), paires, fmt="%d")
+    sortie = tmp_path / "serie.json"
+    tp.main(["--aretes", str(aretes_txt), "--graine", "1", "--processus", "1", "--sortie", str(sortie)] + options)
+    serie = json.loads(sortie.read_text())
+    assert len(serie["valeurs"]["nb_consult"]) >= 2